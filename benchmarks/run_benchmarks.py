@@ -0,0 +1,191 @@
+"""
+Throughput benchmarks for the MCTS engine and the bundled games.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+Each case runs a fixed, seeded number of rounds from a fixed position and
+reports rounds per second, peak traced memory and the engine's per-phase
+profile as JSON. Peak memory is measured in a second, identically seeded pass
+under tracemalloc so that tracing does not distort the timing.
+
+With --compare, cases whose throughput drops, or whose peak memory grows, by
+more than --tolerance relative to the baseline are reported and the exit
+status is 1, so regressions can be caught before a release.
+
+The ligand case uses the synthetic pocket, fragment file and fake ``mopac``
+executable in benchmarks/data, so no external software or network is needed.
+"""
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    import mcts_gen
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+    import mcts_gen
+
+from mcts_gen.services.mcts_engine import McpMcts
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+CASES: List[Dict[str, Any]] = [
+    {"name": "tictactoe", "module": "mcts_gen.games.dummy_game", "class": "TicTacToeDummy", "kwargs": {}, "rounds": 2000},
+    {"name": "chess_opening", "module": "mcts_gen.games.chess_mcts", "class": "ChessGameState",
+     "kwargs": {"fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"}, "rounds": 10},
+    {"name": "chess_middlegame", "module": "mcts_gen.games.chess_mcts", "class": "ChessGameState",
+     "kwargs": {"fen": "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"}, "rounds": 10},
+    {"name": "chess_endgame", "module": "mcts_gen.games.chess_mcts", "class": "ChessGameState",
+     "kwargs": {"fen": "8/5k2/8/3K4/8/8/4P3/8 w - - 0 1"}, "rounds": 50},
+    {"name": "shogi_opening", "module": "mcts_gen.games.shogi_mcts", "class": "ShogiGameState",
+     "kwargs": {"sfen": "lnsgkgsnl/1r5b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL b - 1"}, "rounds": 2},
+    {"name": "shogi_middlegame", "module": "mcts_gen.games.shogi_mcts", "class": "ShogiGameState",
+     "kwargs": {"sfen": "ln1g3nl/1r1sk1g2/p1pppp1pp/6p2/1p7/2P1P4/PPSP1PPPP/2G1K2R1/LN3GSNL b Bb 1"}, "rounds": 2},
+    {"name": "ligand", "module": "mcts_gen.games.ligand_mcts", "class": "LigandMCTSGameState",
+     "kwargs": {"pocket_path": os.path.join(DATA_DIR, "pocket.pdb"),
+                "source_molecule_path": os.path.join(DATA_DIR, "fragments.smi"),
+                "target_size": 12},
+     "rounds": 30},
+]
+
+
+def _seed(seed: int):
+    random.seed(seed)
+    np.random.seed(seed % (2**32))
+
+
+def _clear_caches():
+    """Clears process-wide caches so that both passes of a case start cold."""
+    ligand = sys.modules.get("mcts_gen.games.ligand_mcts")
+    if ligand is not None:
+        ligand.conformer_cache.clear()
+
+
+def _new_engine(case: Dict[str, Any], engine_kwargs: Dict[str, Any]) -> McpMcts:
+    module = importlib.import_module(case["module"])
+    state = getattr(module, case["class"])(**case["kwargs"])
+    return McpMcts(initial_state=state, **engine_kwargs)
+
+
+def run_case(case: Dict[str, Any], rounds: int, seed: int, exploration_constant: float, engine_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs one benchmark case: a timed pass and a traced pass for peak memory."""
+    _seed(seed)
+    _clear_caches()
+    engine = _new_engine(case, engine_kwargs)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        engine.run_round(exploration_constant)
+    seconds = time.perf_counter() - start
+    profile = engine.performance_profile()
+
+    _seed(seed)
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        traced = _new_engine(case, engine_kwargs)
+        for _ in range(rounds):
+            traced.run_round(exploration_constant)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rounds": rounds,
+        "seconds": seconds,
+        "rounds_per_second": rounds / seconds if seconds > 0 else 0.0,
+        "peak_memory_bytes": peak,
+        "nodes": engine.num_nodes,
+        "root_visits": engine.root.numVisits,
+        "mean_rollout_length": profile["mean_rollout_length"],
+        "phase_share": {name: phase["share"] for name, phase in profile["phases"].items()},
+        "game": profile["game"],
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Returns a description of every case that regressed against the baseline."""
+    regressions = []
+    for name, current in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if not base or "error" in current or "error" in base:
+            continue
+        speed = current["rounds_per_second"] / base["rounds_per_second"] if base["rounds_per_second"] else 1.0
+        memory = current["peak_memory_bytes"] / base["peak_memory_bytes"] if base["peak_memory_bytes"] else 1.0
+        current["vs_baseline"] = {"speed_ratio": speed, "memory_ratio": memory}
+        if speed < 1.0 - tolerance:
+            regressions.append(f"{name}: {current['rounds_per_second']:.1f} rounds/s vs {base['rounds_per_second']:.1f} ({speed:.2f}x)")
+        if memory > 1.0 + tolerance:
+            regressions.append(f"{name}: peak memory {current['peak_memory_bytes']} B vs {base['peak_memory_bytes']} B ({memory:.2f}x)")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure MCTS rounds/sec and peak memory for the bundled games.")
+    parser.add_argument("--cases", nargs="*", help="Case names to run (default: all).")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for each case's round count.")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--exploration-constant", type=float, default=1.4)
+    parser.add_argument("--tree-backend", default="node", choices=("node", "array"))
+    parser.add_argument("--rollout-depth", type=int, help="Cut rollouts off after this many plies (default: play to the end).")
+    parser.add_argument("--output", help="Write the JSON results to this file (default: stdout).")
+    parser.add_argument("--compare", help="Baseline JSON file produced by an earlier run.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown or memory growth.")
+    args = parser.parse_args(argv)
+
+    # Ligand scoring calls `mopac`; use the bundled stand-in.
+    os.environ["PATH"] = os.path.join(DATA_DIR, "bin") + os.pathsep + os.environ.get("PATH", "")
+    engine_kwargs = {"tree_backend": args.tree_backend, "rollout_depth": args.rollout_depth}
+
+    selected = [case for case in CASES if not args.cases or case["name"] in args.cases]
+    results: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mcts_gen_path": os.path.dirname(mcts_gen.__file__),
+            "seed": args.seed,
+            "scale": args.scale,
+            "tree_backend": args.tree_backend,
+            "rollout_depth": args.rollout_depth,
+        },
+        "cases": {},
+    }
+    for case in selected:
+        rounds = max(1, int(case["rounds"] * args.scale))
+        try:
+            # Keep progress messages printed by the games off the JSON output.
+            with contextlib.redirect_stdout(sys.stderr):
+                results["cases"][case["name"]] = run_case(case, rounds, args.seed, args.exploration_constant, engine_kwargs)
+        except ImportError as e:
+            results["cases"][case["name"]] = {"error": f"skipped: {e}"}
+        sys.stderr.write(f"[bench] {case['name']}: {results['cases'][case['name']]}\n")
+
+    regressions: List[str] = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for line in regressions:
+        sys.stderr.write(f"[bench] REGRESSION {line}\n")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
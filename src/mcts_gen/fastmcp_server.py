@@ -39,14 +39,18 @@ def mcts_autonomous_search(goal: str, ctx: Context) -> list[PromptMessage]:
         "",
         "1. **EXECUTE Batch**: Call `run_mcts_analysis(exploration_constant=..., num_rounds=..., actions_to_expand=...)`.",
         "   - Use `num_rounds` (e.g., 10-50) to set your 'Search Limit'.",
-        "   - On subsequent rounds, use `actions_to_expand` to focus the search. You can get all possible branches via `get_possible_actions`.",
+        "   - For predictable latency, pass `time_limit_ms`. Add `stable_rounds` or `stop_when_decided=True` to stop early once the best move has settled; the result reports `stop_reason`.",
+        "   - For long ligand batches, `start_mcts_analysis` runs the search in the background and returns a `job_id`. Poll `get_job_status(job_id)` for rounds done and the current best move, and call `cancel_job(job_id)` once it is good enough.",
+        "   - On subsequent rounds, use `actions_to_expand` to focus the search. You can get all possible branches via `get_possible_actions`. Strings that match no legal action are listed once in the result's `unmatched_actions`.",
         "",
         "2. **ANALYZE Results**: The tool returns the latest `simulation_stats`.\n           - If using multiple slots, call `get_multi_slot_summary()` to compare progress.",
         "",
-        "3. **DECIDE Next Step**:\n           - **Predictive Branching:** If you are confident about a future state, initialize a new `slot_id` with that state and run background analysis.\n           - **Slot Activation:** If a predicted state occurs, call `activate_mcts_slot(slot_id)` to swap contexts immediately.",
+        "3. **DECIDE Next Step**:\n           - **Predictive Branching:** If you are confident about a future state, initialize a new `slot_id` with that state and run background analysis. Use `run_multi_slot_analysis(slot_ids=[...])` to search several predicted slots concurrently.\n           - **Slot Activation:** If a predicted state occurs, call `activate_mcts_slot(slot_id)` to swap contexts immediately.",
         "",
         "4. **FINALIZE**: Once the search has converged, call `get_best_move()` or `get_principal_variation()`.",
         "",
+        "5. **CONTINUE THE GAME**: When a move is actually played (by either side), call `advance_root(action=...)` instead of `reinitialize_mcts` to keep the statistics already gathered for the resulting position.",
+        "",
         "**CRITICAL RULE: NEVER call the same tool twice in a row in a single turn. Always analyze the output before making the next call.**",
     ]
     detail = "\n".join(workflow)
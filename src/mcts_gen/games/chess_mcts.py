@@ -1,18 +1,27 @@
 # src/mcts_gen/games/chess_mcts.py
 
 from copy import deepcopy
+import math
 import chess
 import chess.pgn
+import chess.polyglot
 from typing import List, Any, Dict
 
 from mcts_gen.models.game_state import GameStateBase
 
+# Static evaluation used at the rollout depth cutoff, in pawns
+PIECE_VALUES = {chess.PAWN: 1.0, chess.KNIGHT: 3.0, chess.BISHOP: 3.0, chess.ROOK: 5.0, chess.QUEEN: 9.0}
+MOBILITY_WEIGHT = 0.1 # Pawns per extra pseudo-legal move
+EVALUATION_SCALE = 10.0 # tanh(score / scale) maps the score to (-1, 1)
+
 class ChessGameState(GameStateBase):
     """
     Implements the game state for Chess using the python-chess library.
     This implementation uses a perspective-based reward system based on an initial color.
     """
 
+    supports_push_pop = True
+
     def __init__(self, fen: str = None):
         if fen:
             self.board = chess.Board(fen)
@@ -36,6 +45,21 @@ class ChessGameState(GameStateBase):
         newState.board.push_uci(action)
         return newState
 
+    def push(self, action: str) -> None:
+        """Plays a UCI move string on this state's board in place."""
+        self.board.push_uci(action)
+
+    def pop(self) -> None:
+        """Takes back the last move played on this state's board."""
+        self.board.pop()
+
+    def scratch_copy(self) -> "ChessGameState":
+        """Copies the board (with its move stack) without deep-copying the whole state."""
+        new_state = ChessGameState.__new__(ChessGameState)
+        new_state.board = self.board.copy()
+        new_state.color = self.color
+        return new_state
+
     def isTerminal(self) -> bool:
         """Checks if the game is over."""
         return self.board.is_game_over()
@@ -65,6 +89,32 @@ class ChessGameState(GameStateBase):
             else: # Draw
                 return 0.0
 
+    def evaluate_position(self) -> float:
+        """
+        Material and mobility balance from the perspective of self.color,
+        squashed to (-1, 1) with tanh. Terminal positions return getReward().
+        """
+        if self.isTerminal():
+            return self.getReward()
+        board = self.board
+        score = 0.0
+        for piece_type, value in PIECE_VALUES.items():
+            score += value * (chess.popcount(board.pieces_mask(piece_type, chess.WHITE))
+                              - chess.popcount(board.pieces_mask(piece_type, chess.BLACK)))
+        # The side not to move is counted on a stackless copy with the turn flipped.
+        other = board.copy(stack=False)
+        other.turn = not board.turn
+        other.ep_square = None
+        mobility = board.pseudo_legal_moves.count() - other.pseudo_legal_moves.count()
+        score += MOBILITY_WEIGHT * (mobility if board.turn == chess.WHITE else -mobility)
+        if self.color == chess.BLACK:
+            score = -score
+        return math.tanh(score / EVALUATION_SCALE)
+
+    def get_state_key(self) -> int:
+        """Returns the Zobrist hash of the position."""
+        return chess.polyglot.zobrist_hash(self.board)
+
     def get_state_summary(self) -> Dict[str, str]:
         """
         Returns a summary of the current game state, including a PGN string.
@@ -73,6 +123,20 @@ class ChessGameState(GameStateBase):
         pgn_string = str(game)
         return {"pgn": pgn_string}
 
+    def to_compact(self) -> bytes:
+        """Serializes the starting FEN and the UCI move stack, keeping the game history."""
+        moves = " ".join(move.uci() for move in self.board.move_stack)
+        return f"{self.board.root().fen()}\n{moves}".encode()
+
+    def from_compact(self, data: bytes) -> "ChessGameState":
+        """Rebuilds a state from `to_compact` output, keeping this state's perspective."""
+        fen, moves = data.decode().split("\n")
+        new_state = ChessGameState(fen)
+        new_state.color = self.color
+        for move in moves.split():
+            new_state.board.push_uci(move)
+        return new_state
+
     def to_dict(self) -> Dict[str, Any]:
         """Serializes the game state to a dictionary."""
         return {"fen": self.board.fen()}
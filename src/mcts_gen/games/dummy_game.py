@@ -7,6 +7,8 @@ from ..models.game_state import GameStateBase
 
 class TicTacToeDummy(GameStateBase):
     """A simplified Tic-Tac-Toe game state for testing the MCTS engine."""
+    supports_push_pop = True
+
     def __init__(self, board: Optional[List[int]] = None, player: int = 1):
         """Initializes the dummy game state.
 
@@ -16,6 +18,7 @@ class TicTacToeDummy(GameStateBase):
         """
         self.board = board or [0] * 9
         self.player = player
+        self.pushed: List[int] = [] # Moves applied in place by push()
 
     def getCurrentPlayer(self) -> int:
         """Returns the current player."""
@@ -31,12 +34,31 @@ class TicTacToeDummy(GameStateBase):
         new_board[action] = self.player
         return TicTacToeDummy(board=new_board, player=-self.player)
 
+    def push(self, action: int) -> None:
+        """Applies a move to this state in place."""
+        self.board[action] = self.player
+        self.player = -self.player
+        self.pushed.append(action)
+
+    def pop(self) -> None:
+        """Undoes the last move applied by push()."""
+        self.board[self.pushed.pop()] = 0
+        self.player = -self.player
+
+    def scratch_copy(self) -> "TicTacToeDummy":
+        """Returns a copy of this state to push/pop on."""
+        return TicTacToeDummy(board=self.board[:], player=self.player)
+
     def isTerminal(self) -> bool:
         """Checks if the game is over (no more moves)."""
         # This is a simplified terminal condition for testing.
         # A real implementation would check for wins.
         return not self.getPossibleActions()
 
+    def get_state_key(self) -> tuple:
+        """Returns the board and the player to move."""
+        return (tuple(self.board), self.player)
+
     def getReward(self) -> float:
         """Returns the reward for the game outcome."""
         # Simplified reward: the previous player is considered the winner.
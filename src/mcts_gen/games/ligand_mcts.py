@@ -50,10 +50,16 @@ will be used.
     and a `pdb_path` key pointing to a saved PDB file of its 3D structure.
 """
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Optional, Any, Dict
+from functools import lru_cache
+from typing import List, Optional, Any, Dict, Tuple
 import os
+import pickle
+import random
 import sys
+import threading
 import numpy as np
 import pandas as pd
 
@@ -183,6 +189,280 @@ def _generate_fragments_from_molecules(molecules: List[Any]) -> List[str]:
     return validated_fragments
 
 
+NUM_ORIENTATIONS = 3 # Explore 3 diverse orientations per attachment
+
+
+# --- Attachment Sites ---
+
+def attachment_sites(mol: Any) -> List[int]:
+    """
+    Returns the indices of the atoms that have a hydrogen to replace with a new
+    bond. Atoms without free valence (e.g. carbonyl oxygens or quaternary
+    carbons) would fail sanitization when a fragment is attached to them.
+    """
+    return [atom.GetIdx() for atom in mol.GetAtoms() if atom.GetTotalNumHs() > 0]
+
+
+@lru_cache(maxsize=None)
+def bonding_fragment(frag_smiles: str) -> Optional[Any]:
+    """
+    Returns the fragment molecule to add, with the atom that forms the new bond
+    first, or None if the SMILES cannot be used. BRICS fragments mark their
+    attachment points with single-bonded dummy atoms ([n*]): the neighbour of
+    the first dummy forms the bond and every dummy is replaced by a hydrogen.
+    Fragments with a double-bonded dummy are rejected. Other fragments
+    bond through their first atom. The cached molecule must be copied before
+    changing.
+    """
+    frag = Chem.MolFromSmiles(frag_smiles)
+    if not frag or frag.GetNumAtoms() == 0:
+        return None
+    dummies = [atom for atom in frag.GetAtoms() if atom.GetAtomicNum() == 0]
+    if not dummies:
+        return frag
+    neighbors = dummies[0].GetNeighbors()
+    if not neighbors or any(bond.GetBondType() != Chem.rdchem.BondType.SINGLE
+                            for atom in dummies for bond in atom.GetBonds()):
+        return None # A dummy on a double bond (BRICS link 7) has no hydrogen equivalent
+    rw_mol = Chem.RWMol(frag)
+    rw_mol.GetAtomWithIdx(neighbors[0].GetIdx()).SetBoolProp("_bonding", True)
+    for atom in dummies:
+        dummy = rw_mol.GetAtomWithIdx(atom.GetIdx())
+        dummy.SetAtomicNum(1)
+        dummy.SetIsotope(0)
+    try:
+        # Replaced dummies become hydrogens of their neighbours.
+        frag = Chem.RemoveHs(rw_mol.GetMol())
+    except Exception:
+        return None
+    bonding = next(atom.GetIdx() for atom in frag.GetAtoms() if atom.HasProp("_bonding"))
+    order = [bonding] + [i for i in range(frag.GetNumAtoms()) if i != bonding]
+    return Chem.RenumberAtoms(frag, order)
+
+
+@lru_cache(maxsize=None)
+def fragment_can_attach(frag_smiles: str) -> bool:
+    """Returns True if the fragment's bonding atom (see bonding_fragment) has a hydrogen to replace."""
+    frag = bonding_fragment(frag_smiles)
+    return frag is not None and frag.GetAtomWithIdx(0).GetTotalNumHs() > 0
+
+
+def _use_hydrogen(atom: Any):
+    """Removes an explicit hydrogen (e.g. of an aromatic [nH]) replaced by a new bond."""
+    if atom.GetNumExplicitHs() > 0:
+        atom.SetNumExplicitHs(atom.GetNumExplicitHs() - 1)
+
+
+# --- Conformer Ensemble Cache ---
+
+class ConformerCache:
+    """
+    A bounded LRU cache of embedded conformer ensembles, shared by every state
+    (and slot) in the process.
+
+    Embedding is seeded, so the ensemble only depends on the molecule (its
+    canonical SMILES and atom order) and on the coordinates fixed from the
+    parent. The orientation actions of one (parent, fragment, attachment atom)
+    therefore share one embedding, as does the same growth step reached in
+    other subtrees or slots. Cached molecules must be copied before changing.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def key(mol: Any, coord_map: Dict[int, Any]) -> tuple:
+        """Returns the canonical SMILES, atom output order and rounded fixed coordinates."""
+        smiles = Chem.MolToSmiles(mol)
+        order = tuple(mol.GetPropsAsDict(True, True).get("_smilesAtomOutputOrder", ()))
+        coords = tuple((i, round(p.x, 3), round(p.y, 3), round(p.z, 3)) for i, p in sorted(coord_map.items()))
+        return (smiles, order, coords)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        with self.lock:
+            mol = self.entries.get(key)
+            if mol is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return mol
+
+    def put(self, key: tuple, mol: Any):
+        with self.lock:
+            self.entries[key] = mol
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "conformer_cache_entries": len(self.entries),
+            "conformer_cache_hits": self.hits,
+            "conformer_cache_misses": self.misses,
+            "conformer_cache_hit_rate": self.hits / lookups if lookups else 0.0,
+            "conformer_cache_evictions": self.evictions,
+        }
+
+
+conformer_cache = ConformerCache()
+
+
+def embed_conformers(mol: Any, coord_map: Dict[int, Any], num_confs: int = 10, random_seed: int = 42,
+                     num_threads: int = 1) -> Any:
+    """
+    Returns `mol` with hydrogens and up to `num_confs` embedded conformers,
+    keeping the atoms in `coord_map` at their parent coordinates. Ensembles are
+    shared through `conformer_cache`; the returned molecule must not be modified.
+    RDKit embeds with `num_threads` threads (0 = all cores) and gives the same
+    conformers for any thread count.
+    """
+    key = ConformerCache.key(mol, coord_map) + (num_confs, random_seed)
+    mol_with_hs = conformer_cache.get(key)
+    if mol_with_hs is None:
+        mol_with_hs = Chem.AddHs(mol)
+        # Use coordMap to fix the parent part (Task-016)
+        AllChem.EmbedMultipleConfs(mol_with_hs, numConfs=num_confs, pruneRmsThresh=0.5, randomSeed=random_seed, coordMap=coord_map,
+                                   numThreads=num_threads)
+        conformer_cache.put(key, mol_with_hs)
+    return mol_with_hs
+
+
+def _growth_embedding(anchor: Optional[Any], pending: List["LigandAction"]) -> Tuple[Dict[int, Any], int, int]:
+    """
+    Returns the fixed coordinates, number of conformers and random seed used to
+    embed the molecule grown from `anchor` by the `pending` actions.
+    """
+    # Preserve the 3D context of the last embedded ancestor. Growth only
+    # appends atoms, so its atom indices are unchanged in the grown molecule.
+    coord_map = {}
+    if anchor is not None and anchor.GetNumConformers() > 0:
+        anchor_conf = anchor.GetConformer()
+        for i in range(anchor.GetNumAtoms()):
+            coord_map[i] = anchor_conf.GetAtomPosition(i)
+    random_seed = 42
+    for action in pending[:-1]:
+        random_seed = (random_seed * 31 + action.orientation_idx + 1) % (2**31 - 1)
+    # A single step embeds 10 conformers like an eager step; several steps only need one
+    # conformer per orientation, as their ensemble is never shared with a single step.
+    num_confs = 10 if len(pending) == 1 else NUM_ORIENTATIONS
+    return coord_map, num_confs, random_seed
+
+
+def _optimized_conformers(ensemble: Any, conf_ids: List[int], num_threads: int = 1) -> Dict[int, Any]:
+    """
+    UFF-optimizes the given conformers of `ensemble` in one (multithreaded) call
+    to refine side chain orientations, and returns each one as a separate
+    molecule without hydrogens. The ensemble itself is not modified.
+    """
+    wanted = set(conf_ids)
+    mol = Chem.Mol(ensemble)
+    for c in list(mol.GetConformers()):
+        if c.GetId() not in wanted:
+            mol.RemoveConformer(c.GetId())
+    AllChem.UFFOptimizeMoleculeConfs(mol, numThreads=num_threads)
+    optimized = {}
+    for conf_id in wanted:
+        # Create a new molecule with only the selected conformer
+        single = Chem.Mol(mol)
+        for c in list(single.GetConformers()):
+            if c.GetId() != conf_id:
+                single.RemoveConformer(c.GetId())
+        optimized[conf_id] = Chem.RemoveHs(single)
+    return optimized
+
+
+def embed_growth(mol: Any, anchor: Optional[Any], pending: List["LigandAction"], num_threads: int = 1) -> Any:
+    """
+    Embeds the molecule grown from `anchor` by the `pending` actions in one
+    pass, keeping the anchor atoms at their coordinates (Task-016), and returns
+    the conformer chosen by the last action's orientation, UFF-optimized. The
+    earlier orientations select the embedding seed, so different orientation
+    sequences give different poses; a single pending action is embedded
+    exactly as an eager growth step would be.
+    """
+    coord_map, num_confs, random_seed = _growth_embedding(anchor, pending)
+    # Generate multiple conformers to reflect orientation and side-chain diversity
+    mol_with_hs = embed_conformers(mol, coord_map, num_confs, random_seed, num_threads)
+    if mol_with_hs.GetNumConformers() == 0:
+        return mol
+    # Select the conformer based on orientation_idx (wrap around if needed)
+    conf_id = pending[-1].orientation_idx % mol_with_hs.GetNumConformers()
+    return _optimized_conformers(mol_with_hs, [conf_id], num_threads)[conf_id]
+
+
+def embed_batch(states: List["LigandState"], num_threads: int = 0):
+    """
+    Embeds the pending growth steps of several states at once, e.g. sibling
+    children or a batch of leaves. States that share a conformer ensemble (the
+    orientations of one attachment) are embedded and UFF-optimized together,
+    and the distinct ensembles run on a thread pool, each using RDKit's
+    `numThreads`. `num_threads` is the total thread budget (0 = all cores).
+    The resulting poses are the same as those of LigandState.embed().
+    """
+    groups: "OrderedDict[tuple, list]" = OrderedDict()
+    for state in states:
+        if not (state.pending and state.mol and Chem):
+            continue
+        coord_map, num_confs, random_seed = _growth_embedding(state.anchor, state.pending)
+        key = ConformerCache.key(state.mol, coord_map) + (num_confs, random_seed)
+        group = groups.setdefault(key, [state.mol, coord_map, num_confs, random_seed, []])
+        group[-1].append(state)
+    if not groups:
+        return
+
+    total_threads = num_threads or os.cpu_count() or 1
+    workers = max(1, min(len(groups), total_threads))
+    inner_threads = max(1, total_threads // workers)
+
+    def embed_group(group: list):
+        mol, coord_map, num_confs, random_seed, members = group
+        poses = [member.mol for member in members]
+        try:
+            mol_with_hs = embed_conformers(mol, coord_map, num_confs, random_seed, inner_threads)
+            if mol_with_hs.GetNumConformers() > 0:
+                conf_ids = [m.pending[-1].orientation_idx % mol_with_hs.GetNumConformers() for m in members]
+                optimized = _optimized_conformers(mol_with_hs, conf_ids, inner_threads)
+                poses = [optimized[conf_id] for conf_id in conf_ids]
+        except Exception as e:
+            sys.stderr.write(f"Conformer/Side-chain generation failed: {e}\n")
+        for member, pose in zip(members, poses):
+            with member.lock:
+                member.mol = pose
+                member.pending = []
+                member.anchor = None
+
+    if workers == 1:
+        for group in groups.values():
+            embed_group(group)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(embed_group, groups.values()))
+
+
+def _pose_hash(mol: Optional[Any]) -> int:
+    """Returns a hash of the rounded heavy-atom coordinates of `mol`, if embedded."""
+    coords = ()
+    if mol is not None and mol.GetNumConformers() > 0:
+        positions = mol.GetConformer().GetPositions()
+        coords = tuple(sorted(map(tuple, np.round(positions, 1).tolist())))
+    return hash(coords)
+
+
 # --- Data Classes ---
 
 @dataclass(frozen=True)
@@ -211,16 +491,46 @@ class LigandState:
     Represents the state of a partially or fully constructed molecule within the
     MCTS search.
 
+    3D embedding is deferred: apply_action only edits the molecular graph and
+    records the action in `pending`. The coordinates are generated by embed()
+    when they are first needed (scoring, spatial filtering, PDB export), so
+    rollout steps whose intermediate states are never scored stay cheap.
+
     Attributes:
         mol: The RDKit molecule object. Can be None for the initial empty state.
+            Has 3D coordinates unless actions are pending.
         history: A list of LigandActions taken to reach this state.
         max_atoms: The number of heavy atoms at which the state is considered terminal.
         fragment_library: A list of SMILES strings for allowed fragments.
+        action_ordering: "grid" lists actions by attachment atom, fragment and orientation;
+            "sampled" lists every orientation-0 action first, each orientation tier in
+            random order, so that progressive widening sees diverse actions early.
+        pending: Actions applied to the graph but not embedded yet, oldest first.
+        anchor: The last embedded molecule, which the pending actions grew from.
+        sites: Cached attachment atom indices of `mol` (see attachment_sites).
+        key: Cached transposition key (see state_key).
+        lock: Guards mol, pending and anchor while embed() replaces them, since
+            tree-parallel threads embed leaves outside the engine lock.
     """
     mol: Optional[Any] = None
     history: List[LigandAction] = field(default_factory=list)
     max_atoms: int = 50
     fragment_library: set[str] = field(default_factory=lambda: {"C", "N", "O", "c1ccccc1", "C(=O)O"})
+    action_ordering: str = "grid"
+    pending: List[LigandAction] = field(default_factory=list)
+    anchor: Optional[Any] = None
+    sites: Optional[List[int]] = field(default=None, repr=False)
+    key: Optional[tuple] = field(default=None, repr=False)
+    lock: Any = field(default_factory=threading.RLock, repr=False, compare=False)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
 
     def to_smiles(self) -> str:
         """Returns the SMILES representation of the current molecule."""
@@ -230,13 +540,59 @@ class LigandState:
 
     def clone(self) -> "LigandState":
         """Creates a deep copy of the current state for exploration."""
-        new_mol = Chem.Mol(self.mol) if self.mol and Chem else None
-        return LigandState(
-            mol=new_mol, 
-            history=list(self.history), 
-            max_atoms=self.max_atoms,
-            fragment_library=self.fragment_library
-        )
+        with self.lock:
+            new_mol = Chem.Mol(self.mol) if self.mol and Chem else None
+            return LigandState(
+                mol=new_mol, 
+                history=list(self.history), 
+                max_atoms=self.max_atoms,
+                fragment_library=self.fragment_library,
+                action_ordering=self.action_ordering,
+                pending=list(self.pending),
+                anchor=self.anchor, # Never modified, so it can be shared
+                sites=self.sites,
+            )
+
+    def attachment_sites(self) -> List[int]:
+        """Returns the atoms a fragment can be bonded to, computed once per state."""
+        if self.sites is None:
+            self.sites = attachment_sites(self.mol) if self.mol and Chem else []
+        return self.sites
+
+    def embed(self) -> Optional[Any]:
+        """
+        Generates the 3D coordinates of the pending growth steps, if any, and
+        returns the embedded molecule. Safe to call from several threads.
+        """
+        with self.lock:
+            if self.pending and self.mol and Chem:
+                try:
+                    self.mol = embed_growth(self.mol, self.anchor, self.pending)
+                except Exception as e:
+                    sys.stderr.write(f"Conformer/Side-chain generation failed: {e}\n")
+                    # Fallback handled by mol_to_points
+                self.pending = []
+                self.anchor = None
+            return self.mol
+
+    def state_key(self) -> Optional[tuple]:
+        """
+        Returns the canonical SMILES plus a hash of the rounded heavy-atom
+        coordinates, so the same molecule in the same pose maps to one key.
+        Without embedding, a state with pending actions is keyed by its anchor's
+        pose and the pending actions, which determine the pose embed() gives.
+        The key is computed once, so it does not change when the state is embedded.
+        """
+        if not self.mol or not Chem:
+            return None
+        with self.lock:
+            if self.key is None:
+                if self.pending:
+                    growth = tuple((a.frag_smiles, a.attach_idx, a.orientation_idx) for a in self.pending)
+                    self.key = (Chem.MolToSmiles(self.mol), _pose_hash(self.anchor), growth)
+                else:
+                    self.key = (Chem.MolToSmiles(self.mol), _pose_hash(self.mol))
+            return self.key
 
     def is_terminal(self) -> bool:
         """Checks if the state is terminal (molecule has reached max size)."""
@@ -253,7 +609,7 @@ class LigandState:
             return []
             
         actions = []
-        num_orientations = 3 # Explore 3 diverse orientations per attachment
+        num_orientations = NUM_ORIENTATIONS
         
         if not self.mol or not Chem:
             # If there's no molecule, actions create one from a fragment.
@@ -262,28 +618,38 @@ class LigandState:
                     actions.append(LigandAction(frag_smiles=frag, orientation_idx=ori))
         else:
             # Allow attachment to heavy atoms within the spatial zone
-            try:
-                conformer = self.mol.GetConformer()
-            except Exception:
-                conformer = None
+            conformer = None
+            if spatial_zone:
+                try:
+                    conformer = self.embed().GetConformer()
+                except Exception:
+                    conformer = None
 
-            num_attach_points = self.mol.GetNumAtoms()
-            for i in range(num_attach_points):
+            # Only atoms with a hydrogen to replace, and fragments whose first atom has one
+            fragments = [frag for frag in sorted(self.fragment_library) if fragment_can_attach(frag)]
+            for i in self.attachment_sites():
                 # Filter by spatial zone if provided
                 if spatial_zone and conformer:
                     pos = conformer.GetAtomPosition(i)
                     if not spatial_zone.contains(pos.x, pos.y, pos.z):
                         continue
 
-                for frag in sorted(list(self.fragment_library)):
+                for frag in fragments:
                     for ori in range(num_orientations):
                         actions.append(LigandAction(frag_smiles=frag, attach_idx=i, orientation_idx=ori))
+
+        if self.action_ordering == "sampled":
+            tiers = [[a for a in actions if a.orientation_idx == ori] for ori in range(num_orientations)]
+            for tier in tiers:
+                random.shuffle(tier)
+            actions = [a for tier in tiers for a in tier]
         return actions
 
     def apply_action(self, action: LigandAction) -> "LigandState":
         """
-        Applies an action to create a new molecular state with a specific conformation,
-        including side chain orientations.
+        Applies an action to the molecular graph. The conformation for the
+        action's orientation, including side chain orientations, is generated
+        lazily by embed().
 
         Returns:
             A new LigandState instance representing the state after the action.
@@ -291,10 +657,15 @@ class LigandState:
         if not Chem:
             raise RuntimeError("RDKit is not available, cannot apply action.")
 
-        new_state = self.clone()
-        frag = Chem.MolFromSmiles(action.frag_smiles)
+        with self.lock:
+            new_state = self.clone()
+            # Grow from this state's coordinates if it is embedded.
+            anchor = new_state.anchor if self.pending else self.mol
+        new_state.sites = None # The grown molecule has different attachment sites
+        frag = bonding_fragment(action.frag_smiles)
         if not frag:
             return new_state
+        frag = Chem.Mol(frag)
 
         if not new_state.mol:
             # First action: the new state's molecule is just the fragment.
@@ -308,52 +679,23 @@ class LigandState:
                 
                 # Atom index in the combined molecule for the existing attachment point
                 atom1_idx = action.attach_idx
-                # Atom index for the first atom of the newly added fragment
+                # Atom index for the bonding atom, the first atom of the newly added fragment
                 # (It's offset by the number of atoms in the original molecule)
                 atom2_idx = new_state.mol.GetNumAtoms()
                 
                 # Form a single bond between the two atoms
                 rw_mol.AddBond(atom1_idx, atom2_idx, Chem.rdchem.BondType.SINGLE)
+                _use_hydrogen(rw_mol.GetAtomWithIdx(atom1_idx))
+                _use_hydrogen(rw_mol.GetAtomWithIdx(atom2_idx))
                 new_state.mol = rw_mol.GetMol()
                 Chem.SanitizeMol(new_state.mol)
             except Exception as e:
                 sys.stderr.write(f"Bond formation failed: {e}. Falling back to disconnected combine.\n")
                 new_state.mol = Chem.CombineMols(new_state.mol, frag)
 
-        # Handle Orientation / Conformation Diversity (Spec-013, Task-016)
-        # This includes side chain rotations.
-        try:
-            # (Task-016) Preserve parent 3D context
-            coord_map = {}
-            if self.mol and self.mol.GetNumConformers() > 0:
-                parent_conf = self.mol.GetConformer()
-                for i in range(self.mol.GetNumAtoms()):
-                    coord_map[i] = parent_conf.GetAtomPosition(i)
-
-            mol_with_hs = Chem.AddHs(new_state.mol)
-            # Generate multiple conformers to reflect orientation and side-chain diversity
-            num_confs = 10 
-            # Use coordMap to fix the parent part (Task-016)
-            AllChem.EmbedMultipleConfs(mol_with_hs, numConfs=num_confs, pruneRmsThresh=0.5, randomSeed=42, coordMap=coord_map)
-            
-            if mol_with_hs.GetNumConformers() > 0:
-                # Select the conformer based on orientation_idx (wrap around if needed)
-                conf_id = action.orientation_idx % mol_with_hs.GetNumConformers()
-                
-                # Create a new molecule with only the selected conformer
-                new_mol = Chem.Mol(mol_with_hs)
-                # Keep only the target conformer
-                for c in list(new_mol.GetConformers()):
-                    if c.GetId() != conf_id:
-                        new_mol.RemoveConformer(c.GetId())
-                
-                # Optimize to refine side chain orientation
-                AllChem.UFFOptimizeMolecule(new_mol, confId=conf_id)
-                new_state.mol = Chem.RemoveHs(new_mol)
-        except Exception as e:
-            sys.stderr.write(f"Conformer/Side-chain generation failed: {e}\n")
-            # Fallback handled by mol_to_points
-        
+        # Handle Orientation / Conformation Diversity (Spec-013, Task-016) lazily
+        new_state.anchor = anchor
+        new_state.pending.append(action)
         new_state.history.append(action)
         return new_state
 
@@ -636,6 +978,46 @@ class Evaluator:
 
         return score
 
+    def total_score_batch(self, mols: List[Any]) -> List[float]:
+        """
+        Scores many molecules at once. Point clouds are built once per molecule,
+        and the USR shape scores and Gaussian overlaps are computed in single
+        NumPy passes. MOPAC still runs per molecule behind the same shape gate
+        as `total_score`.
+        """
+        scores = [self._chemical_penalties(mol) for mol in mols]
+        valid = [i for i, chem in enumerate(scores) if chem >= 0]
+        points = [mol_to_points(mols[i]) for i in valid]
+        embedded = [k for k, p in enumerate(points) if p.size > 0]
+
+        shape = np.zeros(len(valid))
+        gaussian = np.zeros(len(valid))
+        if embedded:
+            usr = np.stack([usr_descriptor(points[k]) for k in embedded])
+            shape[embedded] = 1.0 / (1.0 + np.linalg.norm(usr - self.pocket_usr, axis=1))
+
+            all_points = np.concatenate([points[k] for k in embedded])
+            if cKDTree and all_points.shape[0] * self.pocket_points.shape[0] > 1_000_000:
+                gaussian[embedded] = [gaussian_overlap(points[k], self.pocket_points, self.sigma) for k in embedded]
+            else:
+                d_sq = np.sum((all_points[:, np.newaxis, :] - self.pocket_points[np.newaxis, :, :]) ** 2, axis=2)
+                per_point = np.exp(-d_sq / (2.0 * self.sigma**2)).sum(axis=1)
+                counts = np.array([points[k].shape[0] for k in embedded])
+                offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+                gaussian[embedded] = np.add.reduceat(per_point, offsets) / np.sqrt(counts * self.pocket_points.shape[0])
+
+        for j, i in enumerate(valid):
+            score = (self.weights.get("shape", 1.0) * shape[j] +
+                     self.weights.get("gaussian", 1.0) * gaussian[j] +
+                     self.weights.get("size", 1.5) * self.size_score(mols[i]) +
+                     scores[i])
+            if shape[j] > 0.3:
+                score += self.weights.get("mopac", 1.0) * self.mopac_score(mols[i])
+            else:
+                self.mopac_result = None
+            scores[i] = float(score)
+        return scores
+
 
 class LigandMCTSGameState(GameStateBase):
     """
@@ -654,7 +1036,8 @@ class LigandMCTSGameState(GameStateBase):
         target_size: int = 30, # (Spec-013) Target heavy atom count
         spatial_zone: Optional[SpatialZone] = None, # (Task-015)
         internal_state: Optional[LigandState] = None, 
-        evaluator: Optional[Evaluator] = None
+        evaluator: Optional[Evaluator] = None,
+        action_ordering: str = "grid" # "grid" or "sampled" (for progressive widening)
     ):
         if not Chem:
             raise ImportError("RDKit is required for ligand generation but is not installed. Please run 'uv pip install rdkit'.")
@@ -686,7 +1069,7 @@ class LigandMCTSGameState(GameStateBase):
             
             # Set max_atoms slightly above target_size to allow for better fitting
             max_atoms = int(target_size * 1.2)
-            self.internal_state = LigandState(fragment_library=fragment_library, max_atoms=max_atoms)
+            self.internal_state = LigandState(fragment_library=fragment_library, max_atoms=max_atoms, action_ordering=action_ordering)
 
 
     def getCurrentPlayer(self) -> int:
@@ -718,6 +1101,77 @@ class LigandMCTSGameState(GameStateBase):
         new_internal_state = self.internal_state.apply_action(action)
         return LigandMCTSGameState(internal_state=new_internal_state, evaluator=self.evaluator)
 
+    def get_state_key(self) -> Optional[tuple]:
+        """Delegates the transposition key to the internal LigandState."""
+        return self.internal_state.state_key()
+
+    def estimate_nbytes(self) -> int:
+        """Counts the molecule and history only; the evaluator is shared by all states."""
+        mol = self.internal_state.mol
+        return (len(mol.ToBinary()) if mol else 0) + 64 * len(self.internal_state.history) + 256
+
+    def materialize(self) -> None:
+        """
+        Embeds a tree state before a rollout from it or its expansion, so that
+        every tree state is grown one step from its embedded parent and gets the
+        pose of its own orientation action, whichever path valued the parent.
+        Sibling orientations share one conformer ensemble, and a rollout only
+        embeds its terminal state from this pose.
+        """
+        self.internal_state.embed()
+
+    def to_compact(self) -> bytes:
+        """
+        Serializes the molecule as an RDKit binary Mol (graph plus coordinates), the
+        action history and, without embedding, the pending actions and their anchor.
+        The fragment library and evaluator are shared with the root.
+        """
+        state = self.internal_state
+        return pickle.dumps((
+            state.mol.ToBinary() if state.mol else None,
+            [(a.frag_smiles, a.attach_idx, a.orientation_idx) for a in state.history],
+            [(a.frag_smiles, a.attach_idx, a.orientation_idx) for a in state.pending],
+            state.anchor.ToBinary() if state.anchor is not None else None,
+        ))
+
+    def from_compact(self, data: bytes) -> "LigandMCTSGameState":
+        """Rebuilds a state from `to_compact` output, sharing this state's evaluator and library."""
+        mol_binary, history, pending, anchor_binary = pickle.loads(data)
+        internal_state = LigandState(
+            mol=Chem.Mol(mol_binary) if mol_binary else None,
+            history=[LigandAction(*a) for a in history],
+            max_atoms=self.internal_state.max_atoms,
+            fragment_library=self.internal_state.fragment_library,
+            action_ordering=self.internal_state.action_ordering,
+            pending=[LigandAction(*a) for a in pending],
+            anchor=Chem.Mol(anchor_binary) if anchor_binary else None,
+        )
+        return LigandMCTSGameState(internal_state=internal_state, evaluator=self.evaluator)
+
+    def takeActions(self, actions: List[LigandAction]) -> List["LigandMCTSGameState"]:
+        """
+        Applies sibling actions and embeds all children at once with embed_batch,
+        so their conformers are generated in parallel and stored on the children.
+        """
+        children = [self.takeAction(action) for action in actions]
+        embed_batch([child.internal_state for child in children])
+        return children
+
+    def evaluate_batch(self, states: List["LigandMCTSGameState"]) -> List[float]:
+        """Embeds the leaf molecules in parallel, then scores them with one batched Evaluator pass."""
+        embed_batch([state.internal_state for state in states])
+        return self.evaluator.total_score_batch([state.internal_state.embed() for state in states])
+
+    def get_performance_counters(self) -> Dict[str, Any]:
+        """Reports MOPAC calls, failures and time of the shared evaluator, and conformer cache use."""
+        mopac = self.evaluator.mopac_evaluator
+        return {
+            "mopac_calls": mopac.calls,
+            "mopac_failures": mopac.failures,
+            "mopac_ms": mopac.total_seconds * 1000,
+            **conformer_cache.stats(),
+        }
+
     def getReward(self) -> float:
         """
         Returns the reward for the current state. The reward is only calculated
@@ -726,7 +1180,7 @@ class LigandMCTSGameState(GameStateBase):
         if not self.isTerminal():
             return 0.0
         
-        return self.evaluator.total_score(self.internal_state.mol)
+        return self.evaluator.total_score(self.internal_state.embed())
     def get_state_summary(self) -> Dict[str, Any]:
         """
         Saves the current molecule to a PDB file and returns a summary.
@@ -740,7 +1194,7 @@ class LigandMCTSGameState(GameStateBase):
         elif hasattr(self.evaluator, 'mopac_result'):
              summary["mopac_status"] = "skipped"
 
-        if self.internal_state.mol:
+        if self.internal_state.embed():
             try:
                 # Ensure output directory exists
                 os.makedirs("mcts_output", exist_ok=True)
@@ -1,15 +1,29 @@
 from copy import deepcopy
+import math
 import shogi
 import shogi.KIF
 from typing import List, Any, Dict
 
 from mcts_gen.models.game_state import GameStateBase
 
+# Static evaluation used at the rollout depth cutoff, in pawns
+PIECE_VALUES = {
+    shogi.PAWN: 1.0, shogi.LANCE: 3.0, shogi.KNIGHT: 4.0, shogi.SILVER: 5.0, shogi.GOLD: 6.0,
+    shogi.BISHOP: 8.0, shogi.ROOK: 10.0, shogi.KING: 0.0,
+    shogi.PROM_PAWN: 6.0, shogi.PROM_LANCE: 6.0, shogi.PROM_KNIGHT: 6.0, shogi.PROM_SILVER: 6.0,
+    shogi.PROM_BISHOP: 10.0, shogi.PROM_ROOK: 12.0,
+}
+HAND_BONUS = 1.1 # Pieces in hand can be dropped anywhere, so they are worth a little more
+MOBILITY_WEIGHT = 0.05 # Pawns per attacked square not occupied by own pieces
+EVALUATION_SCALE = 15.0 # tanh(score / scale) maps the score to (-1, 1)
+
 class ShogiGameState(GameStateBase):
     """
     Implements the game state for Shogi using the python-shogi library.
     """
 
+    supports_push_pop = True
+
     def __init__(self, sfen: str = ""):
         if not sfen:
             self.board = shogi.Board()
@@ -29,6 +43,14 @@ class ShogiGameState(GameStateBase):
         newState.board.push_usi(action)
         return newState
 
+    def push(self, action: str) -> None:
+        """Plays a USI move string on this state's board in place."""
+        self.board.push_usi(action)
+
+    def pop(self) -> None:
+        """Takes back the last move played on this state's board."""
+        self.board.pop()
+
     def isTerminal(self) -> bool:
         return self.board.is_game_over()
 
@@ -43,6 +65,33 @@ class ShogiGameState(GameStateBase):
         else:
             return 0.0
 
+    def evaluate_position(self) -> float:
+        """
+        Material (board and hand) and mobility balance from Black's perspective,
+        matching getReward, squashed to (-1, 1) with tanh. Terminal positions
+        return getReward().
+        """
+        if self.isTerminal():
+            return self.getReward()
+        board = self.board
+        score = 0.0
+        for square in shogi.SQUARES:
+            piece = board.piece_at(square)
+            if piece is None:
+                continue
+            sign = 1.0 if piece.color == shogi.BLACK else -1.0
+            attacks = board.attacks_from(piece.piece_type, square, board.occupied, piece.color)
+            mobility = bin(attacks & ~board.occupied[piece.color]).count("1")
+            score += sign * (PIECE_VALUES[piece.piece_type] + MOBILITY_WEIGHT * mobility)
+        for color, sign in ((shogi.BLACK, 1.0), (shogi.WHITE, -1.0)):
+            for piece_type, count in board.pieces_in_hand[color].items():
+                score += sign * HAND_BONUS * PIECE_VALUES[piece_type] * count
+        return math.tanh(score / EVALUATION_SCALE)
+
+    def get_state_key(self) -> str:
+        """Returns the SFEN of the position without the move number."""
+        return " ".join(self.board.sfen().split(" ")[:3])
+
     def get_state_summary(self) -> Dict[str, str]:
         """
         Returns a summary of the current game state, including a KIF string with move history.
@@ -60,6 +109,22 @@ class ShogiGameState(GameStateBase):
 
         return {"kif": "\n".join(kif_moves)}
 
+    def to_compact(self) -> bytes:
+        """Serializes the starting SFEN and the USI move stack, keeping the game history."""
+        start = deepcopy(self.board)
+        while start.move_stack:
+            start.pop()
+        moves = " ".join(move.usi() for move in self.board.move_stack)
+        return f"{start.sfen()}\n{moves}".encode()
+
+    def from_compact(self, data: bytes) -> "ShogiGameState":
+        """Rebuilds a state from `to_compact` output."""
+        sfen, moves = data.decode().split("\n")
+        new_state = ShogiGameState(sfen)
+        for move in moves.split():
+            new_state.board.push_usi(move)
+        return new_state
+
     def to_dict(self) -> Dict[str, Any]:
         """Serializes the game state to a dictionary for logging."""
         return {"sfen": self.board.sfen()}
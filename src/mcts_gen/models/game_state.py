@@ -1,11 +1,17 @@
+import pickle
+from copy import deepcopy
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, Dict, Hashable, List, Optional, Sequence
 
 class GameStateBase(ABC):
     """
     Abstract base class for any game environment that can be used with McpMcts.
     """
 
+    # Set by games that implement push/pop, which lets the engine play rollouts
+    # by mutating one scratch state instead of creating a new state per ply.
+    supports_push_pop: bool = False
+
     @abstractmethod
     def getCurrentPlayer(self) -> int:
         """
@@ -29,6 +35,14 @@ class GameStateBase(ABC):
         """
         pass
 
+    def takeActions(self, actions: Sequence[Any]) -> List["GameStateBase"]:
+        """
+        Returns the states after each of the given sibling actions, used by the
+        engine's batched expansion mode. Games with expensive transitions (e.g.
+        conformer generation) override it to build the children together.
+        """
+        return [self.takeAction(action) for action in actions]
+
     @abstractmethod
     def isTerminal(self) -> bool:
         """
@@ -44,9 +58,98 @@ class GameStateBase(ABC):
         """
         pass
 
+    def push(self, action: Any) -> None:
+        """
+        Applies the given action to this state in place. Only used when
+        `supports_push_pop` is True.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support push/pop.")
+
+    def pop(self) -> None:
+        """
+        Undoes the most recent `push`, restoring the previous position.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support push/pop.")
+
+    def scratch_copy(self) -> "GameStateBase":
+        """
+        Returns an independent copy of this state to `push`/`pop` on, so that
+        states stored in the search tree are never mutated. Defaults to deepcopy.
+        """
+        return deepcopy(self)
+
+    def materialize(self) -> None:
+        """
+        Called on a state kept in the search tree before the engine builds on
+        it: before a random rollout from the leaf and before its children are
+        created. Games that compute part of a state lazily (e.g. ligand 3D
+        embedding) override it to compute that part, so that tree states never
+        build on an uncomputed parent. It may be called from several threads
+        at once. Does nothing by default.
+        """
+
+    def evaluate_position(self) -> Optional[float]:
+        """
+        Returns a fast static estimate of getReward() in [-1, 1] (same
+        perspective), used when the engine cuts a rollout off at `rollout_depth`.
+        Returns None by default, in which case the rollout is played to the end.
+        """
+        return None
+
     def get_state_summary(self) -> Any:
         """
         Returns a summary of the current state.
         This can be overridden by subclasses to provide richer, game-specific information.
         """
         return str(self)
+
+    def get_state_key(self) -> Optional[Hashable]:
+        """
+        Returns a hashable key identifying the position, used by the engine's
+        transposition table to merge states reached by different move orders.
+        Returns None by default, which disables merging for this game.
+        """
+        return None
+
+    def estimate_nbytes(self) -> int:
+        """
+        Returns a rough memory footprint of this state in bytes, used by the
+        engine's tree memory budget. Defaults to the size of the pickled state.
+        """
+        try:
+            return len(pickle.dumps(self))
+        except Exception:
+            return 1024
+
+    def to_compact(self) -> bytes:
+        """
+        Serializes this state compactly for tree checkpoints. Defaults to pickle;
+        games override it with e.g. FEN/SFEN or a binary molecule.
+        """
+        return pickle.dumps(self)
+
+    def from_compact(self, data: bytes) -> "GameStateBase":
+        """
+        Rebuilds a state from `to_compact` output. It is called on the restored
+        root state, so games can reuse shared context (e.g. an evaluator) from it.
+        """
+        return pickle.loads(data)
+
+    def get_performance_counters(self) -> Dict[str, Any]:
+        """
+        Returns game-specific performance counters (e.g. external evaluator calls
+        and time, cache hits), reported by the engine's performance profile.
+        Returns an empty dictionary by default.
+        """
+        return {}
+
+    def evaluate_batch(self, states: Sequence["GameStateBase"]) -> Optional[List[float]]:
+        """
+        Returns a value estimate for each of the given leaf states in one call,
+        used by the engine's batched evaluation mode in place of rollouts.
+        Values are on the scale of a rollout result (the getReward() of the state
+        the playout ends in); the engine signs them for the leaf's player as it
+        does rollout results. Returns None by default, in which case each leaf is
+        evaluated individually.
+        """
+        return None
@@ -1,13 +1,20 @@
 
+import contextlib
 import importlib
-import sys
+import os
+import random
+import time
 # import math
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from fastmcp import FastMCP
 
 from ..services.mcts_engine import McpMcts
 from ..services.slot_manager import SlotManager
+from ..services.parallel_search import run_root_parallel, run_tree_parallel, run_slots_parallel
+from ..services.checkpoint import save_engine, load_engine, read_metadata
+from ..services.analysis_jobs import AnalysisJob
+from ..services.profiling import SearchProfile
 from ..models.spatial import SpatialZone
 # from ..models.game_state import GameStateBase
 
@@ -16,22 +23,41 @@ class AiGpSimulator:
     A stateful simulator that encapsulates an MCTS engine and provides a set of
     generic, game-agnostic tools for an AI agent.
     """
-    def __init__(self, mcp_instance: FastMCP):
+
+    MAX_FINISHED_JOBS = 16 # Finished background jobs kept until their final status is polled
+
+    def __init__(self, mcp_instance: FastMCP, checkpoint_dir: str = "mcts_checkpoints"):
         self.mcp = mcp_instance
+        self.checkpoint_dir = checkpoint_dir # save_slot/load_slot paths are confined to this directory
         self.slots = SlotManager()
         self.simulation_state: Dict[str, Any] = {}
+        self.jobs: Dict[str, AnalysisJob] = {}
+        self.profile = SearchProfile() # Server-side overhead around the engine rounds
+        self.searching_slots: set[str] = set() # Slots of the current multi-slot batch, kept in memory
+        self.slots.can_spill = lambda slot_id, engine: slot_id not in self.searching_slots and self._busy_error(engine) is None
         self._reset_simulation_state()
 
         self.mcp.tool(self.reinitialize_mcts)
+        self.mcp.tool(self.advance_root)
         self.mcp.tool(self.run_mcts_round)
         self.mcp.tool(self.get_best_move)
         self.mcp.tool(self.get_simulation_stats)
+        self.mcp.tool(self.get_performance_profile)
         self.mcp.tool(self.get_possible_actions)
         self.mcp.tool(self.get_principal_variation)
         self.mcp.tool(self.run_mcts_analysis)
+        self.mcp.tool(self.run_parallel_analysis)
+        self.mcp.tool(self.run_tree_parallel_analysis)
+        self.mcp.tool(self.run_multi_slot_analysis)
+        self.mcp.tool(self.start_mcts_analysis)
+        self.mcp.tool(self.get_job_status)
+        self.mcp.tool(self.cancel_job)
         self.mcp.tool(self.activate_mcts_slot)
         self.mcp.tool(self.list_mcts_slots)
+        self.mcp.tool(self.set_slot_memory_budget)
         self.mcp.tool(self.get_multi_slot_summary)
+        self.mcp.tool(self.save_slot)
+        self.mcp.tool(self.load_slot)
 
     @property
     def engine(self) -> McpMcts | None:
@@ -43,6 +69,29 @@ class AiGpSimulator:
         """Updates the engine for the active slot."""
         self.slots.set_slot(self.slots.active_slot, value)
 
+    def _busy_error(self, engine: McpMcts | None = None) -> str | None:
+        """Returns an error message if a background job is searching `engine` (default: the active slot)."""
+        engine = engine or self.engine
+        for job in self.jobs.values():
+            if job.running and job.engine is engine:
+                return f"Slot '{job.slot_id}' is busy with background job '{job.job_id}'. Cancel it or wait for it to finish."
+        return None
+
+    def _slot_busy_error(self, slot_id: str) -> str | None:
+        """Returns an error message if a background job is searching the engine held in `slot_id`."""
+        engine = self.slots.slots.get(slot_id)
+        return self._busy_error(engine) if engine is not None else None
+
+    def _job_lock(self, engine: McpMcts):
+        """
+        Returns the per-round lock of a background job searching `engine`, so a
+        tool can read or copy the tree between rounds, or a no-op context.
+        """
+        for job in self.jobs.values():
+            if job.running and job.engine is engine:
+                return job.lock
+        return contextlib.nullcontext()
+
     def _reset_simulation_state(self):
         """Resets the state variables for a single evaluation run."""
         self.simulation_state = {
@@ -51,7 +100,7 @@ class AiGpSimulator:
             'improvement': 0,
         }
 
-    def reinitialize_mcts(self, state_module: str, state_class: str, state_kwargs: Dict[str, Any] = {}, iteration_limit: int = 100, slot_id: str = "main", spatial_filter: Dict[str, float] | None = None) -> Dict[str, Any]:
+    def reinitialize_mcts(self, state_module: str, state_class: str, state_kwargs: Dict[str, Any] = {}, iteration_limit: int = 100, slot_id: str = "main", spatial_filter: Dict[str, float] | None = None, tree_backend: str = "node", transposition_table: bool = False, transposition_size: int = 100000, transposition_eviction: str = "lru", widening_constant: float | None = None, widening_exponent: float = 0.5, max_nodes: int | None = None, max_bytes: int | None = None, rollout_depth: int | None = None, compact_states: bool = False, state_cache_size: int = 10000, state_record_interval: int = 16, expansion_batch_size: int | None = None) -> Dict[str, Any]:
         """
         Starts a new MCTS simulation for a given game.
         
@@ -62,7 +111,31 @@ class AiGpSimulator:
             iteration_limit: Search budget for the engine.
             slot_id: Identifier for the search context (defaults to "main").
             spatial_filter: Optional coordinate range (x_min, x_max, etc.) for ligand games.
+            tree_backend: "node" (default) or "array". The array backend keeps node statistics
+                in NumPy arrays and is faster and smaller on wide trees.
+            transposition_table: Merge positions reached by different move orders into one node
+                (requires the "node" backend).
+            transposition_size: Maximum number of positions kept in the transposition table.
+            transposition_eviction: "lru" or "least_visited" eviction when the table is full.
+            widening_constant: Enables progressive widening: a node may have at most
+                widening_constant * visits ** widening_exponent children.
+            widening_exponent: Exponent of the progressive widening schedule.
+            max_nodes: Optional node budget for this slot's tree.
+            max_bytes: Optional estimated memory budget in bytes for this slot's tree.
+                When a budget is exceeded, the least-visited subtrees are pruned.
+            rollout_depth: Optional rollout cutoff in plies. Cut-off rollouts are scored with the
+                game's static evaluation (material and mobility for chess and shogi).
+            compact_states: Keep only each node's action (plus a compact record every
+                state_record_interval plies) and rebuild states on demand ("node" backend only).
+            state_cache_size: Number of materialized states kept by compact_states.
+            state_record_interval: Plies between compact state records; use 1 for ligands,
+                whose 3D embedding cannot be replayed exactly.
+            expansion_batch_size: Build the states of this many untried sibling actions at once
+                ("node" backend only); ligands then generate their conformers in parallel.
         """
+        busy = self._slot_busy_error(slot_id)
+        if busy:
+            return {"error": busy}
         try:
             # Handle Spatial Filtering (Task-015)
             if spatial_filter:
@@ -73,7 +146,23 @@ class AiGpSimulator:
             game_class = getattr(module, state_class)
             initial_state = game_class(**state_kwargs)
             
-            new_engine = McpMcts(initial_state=initial_state, iterationLimit=iteration_limit)
+            new_engine = McpMcts(
+                initial_state=initial_state,
+                iterationLimit=iteration_limit,
+                tree_backend=tree_backend,
+                transposition_table=transposition_table,
+                transposition_size=transposition_size,
+                transposition_eviction=transposition_eviction,
+                widening_constant=widening_constant,
+                widening_exponent=widening_exponent,
+                max_nodes=max_nodes,
+                max_bytes=max_bytes,
+                rollout_depth=rollout_depth,
+                compact_states=compact_states,
+                state_cache_size=state_cache_size,
+                state_record_interval=state_record_interval,
+                expansion_batch_size=expansion_batch_size,
+            )
             self.slots.set_slot(slot_id, new_engine)
             self.slots.active_slot = slot_id
             
@@ -82,6 +171,35 @@ class AiGpSimulator:
         except Exception as e:
             return {"error": f"Failed to re-initialize MCTS: {e}"}
 
+    def advance_root(self, action: str) -> Dict[str, Any]:
+        """
+        Advances the active search to the position after `action` has been played,
+        reusing the matching subtree instead of starting a new search.
+
+        Args:
+            action: The string representation of the played move (e.g., UCI or USI).
+        """
+        if not self.engine:
+            return {"error": "MCTS engine not initialized."}
+        busy = self._busy_error()
+        if busy:
+            return {"error": busy}
+        try:
+            candidates = {str(a): a for a in self.engine.root.children}
+            if action not in candidates:
+                candidates = {str(a): a for a in self.engine.root.state.getPossibleActions()}
+            if action not in candidates:
+                return {"error": f"Action '{action}' is not legal in the current root state."}
+
+            reused_visits = self.engine.advance_root(candidates[action])
+            self._reset_simulation_state()
+            return {
+                "status": f"Root advanced by '{action}'.",
+                "reused_visits": reused_visits
+            }
+        except Exception as e:
+            return {"error": f"Failed to advance root: {e}"}
+
     def activate_mcts_slot(self, slot_id: str) -> Dict[str, Any]:
         """Swaps the active search context to a previously initialized slot."""
         if self.slots.activate_slot(slot_id):
@@ -89,44 +207,156 @@ class AiGpSimulator:
         return {"error": f"Slot '{slot_id}' not found."}
 
     def list_mcts_slots(self) -> Dict[str, Any]:
-        """Returns a list of all initialized search contexts."""
-        return {"slots": self.slots.list_slots(), "active_slot": self.slots.active_slot}
+        """
+        Returns a list of all initialized search contexts with their tree sizes. Slots
+        spilled to disk are reported as such without being reloaded.
+        """
+        memory = {
+            slot_id: {"spilled": True} if self.slots.is_spilled(slot_id) else self.slots.slots[slot_id].memory_usage()
+            for slot_id in self.slots.list_slots()
+        }
+        return {
+            "slots": self.slots.list_slots(),
+            "active_slot": self.slots.active_slot,
+            "memory": memory,
+            "slot_manager": self.slots.stats()
+        }
+
+    def set_slot_memory_budget(self, max_bytes: int | None, spill_dir: str | None = None) -> Dict[str, Any]:
+        """
+        Caps the estimated memory of all slots held in memory. When the cap is exceeded,
+        the least recently used inactive slots are written to `spill_dir` and reloaded
+        automatically the next time they are used.
+
+        Args:
+            max_bytes: Total budget in bytes, or None to disable spilling.
+            spill_dir: Directory for spilled slots (defaults to a temporary directory).
+        """
+        self.slots.max_bytes = max_bytes
+        if spill_dir:
+            self.slots.spill_dir = spill_dir
+        try:
+            spilled = self.slots.enforce_budget()
+        except Exception as e:
+            return {"error": f"Failed to spill slots: {e}"}
+        return {"status": f"Slot memory budget set; {spilled} slots spilled.", **self.slots.stats()}
+
+    def _checkpoint_path(self, path: str) -> str:
+        """Resolves a checkpoint path inside `checkpoint_dir`, rejecting paths that leave it."""
+        root = os.path.realpath(self.checkpoint_dir)
+        resolved = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, resolved]) != root or resolved == root:
+            raise ValueError(f"Checkpoint paths must name a file inside '{self.checkpoint_dir}'.")
+        return resolved
+
+    def save_slot(self, slot_id: str, path: str) -> Dict[str, Any]:
+        """
+        Writes a slot's search tree to a compact binary checkpoint file, so that it
+        survives a server restart.
+
+        Args:
+            slot_id: The slot to save.
+            path: Destination file name, relative to the server's checkpoint directory.
+        """
+        engine = self.slots.get_slot(slot_id)
+        if not engine:
+            return {"error": f"Slot '{slot_id}' not found."}
+        try:
+            path = self._checkpoint_path(path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with self._job_lock(engine):
+                summary = save_engine(engine, path, metadata={"slot_id": slot_id})
+            return {"status": f"Slot '{slot_id}' saved to '{path}'.", **summary}
+        except Exception as e:
+            return {"error": f"Failed to save slot: {e}"}
+
+    def load_slot(self, path: str, slot_id: str | None = None) -> Dict[str, Any]:
+        """
+        Restores a search tree saved with `save_slot` and activates it. The file is
+        memory-mapped and node states are rebuilt lazily, so large trees load quickly.
+        Restored trees use the "array" backend, unless the slot used transpositions,
+        compact states or batched expansion, which need the "node" backend.
+
+        Args:
+            path: Checkpoint file name, relative to the server's checkpoint directory.
+            slot_id: Slot to restore into (defaults to the slot the tree was saved from).
+        """
+        try:
+            path = self._checkpoint_path(path)
+            slot_id = slot_id or read_metadata(path).get("slot_id", "main")
+            busy = self._slot_busy_error(slot_id)
+            if busy:
+                return {"error": busy}
+            engine = load_engine(path)
+        except Exception as e:
+            return {"error": f"Failed to load slot: {e}"}
+        self.slots.set_slot(slot_id, engine)
+        self.slots.active_slot = slot_id
+        self._reset_simulation_state()
+        return {
+            "status": f"Slot '{slot_id}' restored from '{path}'.",
+            "root_visits": engine.root.numVisits,
+            "nodes": engine.num_nodes
+        }
 
     def run_mcts_round(self, exploration_constant: float, actions_to_expand: List[str] | None = None) -> Dict[str, Any]:
         """Executes a single MCTS round and updates the simulation state."""
         if not self.engine:
             return {"error": "MCTS engine not initialized."}
+        busy = self._busy_error()
+        if busy:
+            return {"error": busy}
 
-        self.simulation_state['previous_eaten'] = self.simulation_state['eaten']
-        
-        if actions_to_expand:
-            # Perform string-based lookup to find the actual action objects
-            try:
-                real_actions = self.engine.root.state.getPossibleActions()
-                action_map = {str(action): action for action in real_actions}
-                actions_to_pass_to_engine = [action_map[s] for s in actions_to_expand if s in action_map]
-                
-                # Check for unmatched action strings to provide feedback to the AI
-                unmatched = [s for s in actions_to_expand if s not in action_map]
-                if unmatched:
-                    sys.stderr.write(f"\n[Warning] The following actions in `actions_to_expand` were not recognized: {unmatched}\n")
-                    sys.stderr.write(f"[Info] Legal action strings are: {[str(a) for a in real_actions]}\n\n")
-
-                # If no actions matched, fallback to None to allow search to proceed (though not pruned)
-                self.engine.pruned_actions = actions_to_pass_to_engine if actions_to_pass_to_engine else None
-            except Exception as e:
-                return {"error": f"Failed to process actions_to_expand: {e}"}
-        else:
+        try:
+            root_mask, unmatched = self._resolve_actions_to_expand(actions_to_expand)
+        except Exception as e:
+            return {"error": f"Failed to process actions_to_expand: {e}"}
+
+        self._run_round(exploration_constant, root_mask)
+        self._update_simulation_state()
+
+        result = {
+            "status": "1 round executed.",
+            "root_visits": self.engine.root.numVisits,
+            "simulation_stats": self.simulation_state
+        }
+        if unmatched:
+            result["unmatched_actions"] = unmatched
+        return result
+
+    def _run_round(self, exploration_constant: float, root_mask: List[Any] | None):
+        """Executes one select/simulate/backpropagate round on the active engine."""
+        # The mask is consumed by the next expansion of the root, so it is set every
+        # round and dropped afterwards if this round did not expand the root.
+        self.engine.pruned_actions = root_mask
+        try:
+            self.engine.run_round(exploration_constant)
+        finally:
             self.engine.pruned_actions = None
+        self.engine.enforce_memory_budget()
 
+    def _resolve_actions_to_expand(self, actions_to_expand: List[str] | None) -> Tuple[List[Any] | None, List[str]]:
+        """
+        Resolves action strings against the root's legal actions.
 
-        # --- MCTS 1-Round Logic ---
-        node = self.engine.selectNode_num(self.engine.root, exploration_constant)
-        reward = self.engine.mctsSolver(node)
-        self.engine.backpropogate(node, reward)
-        # --- End of 1-Round Logic ---
+        Returns:
+            The matched action objects (None if nothing matched, so the search proceeds
+            unpruned) and the strings that did not match any legal action.
+        """
+        if not actions_to_expand:
+            return None, []
+        start = time.perf_counter()
+        # Perform string-based lookup to find the actual action objects
+        action_map = {str(action): action for action in self.engine.root.state.getPossibleActions()}
+        matched = [action_map[s] for s in actions_to_expand if s in action_map]
+        unmatched = [s for s in actions_to_expand if s not in action_map]
+        self.profile.add("action_resolution", time.perf_counter() - start)
+        return (matched or None), unmatched
 
-        # --- State Update Logic ---
+    def _update_simulation_state(self):
+        """Updates 'eaten' from the best root child and classifies the improvement."""
+        start = time.perf_counter()
+        self.simulation_state['previous_eaten'] = self.simulation_state['eaten']
         if self.engine.root.children:
             best_child = self.engine.getBestChild(self.engine.root, 0) # Use 0 exploration for pure exploitation
             if best_child and best_child.numVisits > 0:
@@ -142,49 +372,349 @@ class AiGpSimulator:
             self.simulation_state['improvement'] = 1
         else:
             self.simulation_state['improvement'] = 0
+        self.profile.add("bookkeeping", time.perf_counter() - start)
 
-        return {
-            "status": "1 round executed.",
-            "root_visits": self.engine.root.numVisits,
-            "simulation_stats": self.simulation_state
-        }
-
-    def run_mcts_analysis(self, exploration_constant: float, num_rounds: int = 10, actions_to_expand: List[str] | None = None) -> Dict[str, Any]:
+    def run_mcts_analysis(self, exploration_constant: float, num_rounds: int | None = 10, actions_to_expand: List[str] | None = None, batch_size: int = 1, time_limit_ms: float | None = None, stable_rounds: int | None = None, stop_when_decided: bool = False) -> Dict[str, Any]:
         """
         Executes a batch of MCTS rounds to improve search precision.
         This provides a 'searchLimit' functionality within a single tool call.
         
         Args:
             exploration_constant: MCTS exploration factor.
-            num_rounds: Number of rounds to execute in this batch.
+            num_rounds: Maximum number of rounds to execute in this batch. May be None
+                if `time_limit_ms` is given.
             actions_to_expand: Optional list of actions to focus the search on.
+            batch_size: If greater than 1, leaves are gathered in groups of this size and
+                scored with one call to the game's `evaluate_batch` hook instead of rollouts.
+            time_limit_ms: Optional wall-clock budget for the batch in milliseconds.
+            stable_rounds: Stop early once the best move (as reported by get_best_move)
+                has not changed for this many rounds; a batch counts as all of its rounds.
+            stop_when_decided: Stop early once the best move is also the most visited root
+                child and its visit lead can no longer be overtaken within the remaining
+                round or time budget.
+
+        The result's `stop_reason` is one of "num_rounds", "time_limit", "stable_best_move"
+        or "decided".
         """
         if not self.engine:
             return {"error": "MCTS engine not initialized."}
+        busy = self._busy_error()
+        if busy:
+            return {"error": busy}
+        if num_rounds is None and not time_limit_ms:
+            return {"error": "Either num_rounds or time_limit_ms must be given."}
 
-        for _ in range(num_rounds):
-            self.run_mcts_round(exploration_constant, actions_to_expand)
-        
+        # Resolve the action filter once for the whole batch.
+        try:
+            root_mask, unmatched = self._resolve_actions_to_expand(actions_to_expand)
+        except Exception as e:
+            return {"error": f"Failed to process actions_to_expand: {e}"}
+
+        start = time.perf_counter()
+        deadline = start + time_limit_ms / 1000 if time_limit_ms else None
+        max_rounds = num_rounds if num_rounds is not None else float("inf")
+        rounds = 0
+        stop_reason = "num_rounds"
+        leader, unchanged = None, 0
+
+        while rounds < max_rounds:
+            if deadline is not None and time.perf_counter() >= deadline:
+                stop_reason = "time_limit"
+                break
+
+            if batch_size > 1:
+                executed = self.engine.run_batched_round(exploration_constant, int(min(batch_size, max_rounds - rounds)), root_mask=root_mask)
+                self.engine.enforce_memory_budget()
+            else:
+                self._run_round(exploration_constant, root_mask)
+                executed = 1
+            rounds += executed
+            self._update_simulation_state()
+
+            if stable_rounds or stop_when_decided:
+                action, first, second = self.engine.root_leaders()
+                if stable_rounds:
+                    # Counted in rounds, so a batch of leaves counts as all of its rounds.
+                    unchanged = unchanged + executed if leader is not None and action == leader else 0
+                    leader = action
+                    if unchanged >= stable_rounds:
+                        stop_reason = "stable_best_move"
+                        break
+                if stop_when_decided:
+                    remaining = max_rounds - rounds
+                    if deadline is not None:
+                        now = time.perf_counter()
+                        rate = rounds / max(now - start, 1e-9)
+                        remaining = min(remaining, rate * max(deadline - now, 0.0))
+                    if first - second > remaining:
+                        stop_reason = "decided"
+                        break
+
+        result = {
+            "status": f"Successfully executed a batch of {rounds} rounds.",
+            "rounds_executed": rounds,
+            "stop_reason": stop_reason,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+            "total_root_visits": self.engine.root.numVisits,
+            "simulation_stats": self.simulation_state
+        }
+        if unmatched:
+            result["unmatched_actions"] = unmatched
+        return result
+
+    def run_parallel_analysis(self, exploration_constant: float, num_workers: int | None = None, num_rounds: int | None = 100, time_limit_ms: float | None = None, seed: int | None = None) -> Dict[str, Any]:
+        """
+        Runs root-parallel MCTS on the active slot: `num_workers` independent searches
+        from the current root run in separate processes, each with its own seed, and
+        their root child statistics are merged into the slot's tree.
+
+        Args:
+            exploration_constant: MCTS exploration factor.
+            num_workers: Number of worker processes (defaults to the CPU count).
+            num_rounds: Rounds per worker. Set to None to run for `time_limit_ms` only.
+            time_limit_ms: Optional wall-clock budget per worker in milliseconds.
+            seed: Optional base seed; worker i uses seed + i.
+        """
+        if not self.engine:
+            return {"error": "MCTS engine not initialized."}
+        busy = self._busy_error()
+        if busy:
+            return {"error": busy}
+        try:
+            result = run_root_parallel(self.engine, exploration_constant, num_workers, num_rounds, time_limit_ms, seed)
+            self.engine.enforce_memory_budget()
+        except Exception as e:
+            return {"error": f"Parallel analysis failed: {e}"}
+
+        self._update_simulation_state()
+        return {
+            "status": f"Merged {sum(result['worker_rounds'])} rounds from {result['num_workers']} workers.",
+            "worker_rounds": result["worker_rounds"],
+            "total_root_visits": self.engine.root.numVisits,
+            "simulation_stats": self.simulation_state
+        }
+
+    def run_tree_parallel_analysis(self, exploration_constant: float, num_threads: int = 4, num_rounds: int | None = 100, time_limit_ms: float | None = None, virtual_loss: float = 1.0) -> Dict[str, Any]:
+        """
+        Runs tree-parallel MCTS on the active slot: `num_threads` workers share the tree,
+        virtual loss keeps them on different paths, and results are backpropagated as
+        evaluations finish. Best suited to ligand searches, where evaluation time is spent
+        in RDKit and MOPAC rather than in Python.
+
+        Args:
+            exploration_constant: MCTS exploration factor.
+            num_threads: Number of worker threads.
+            num_rounds: Total rounds shared by all threads. Set to None to run for `time_limit_ms` only.
+            time_limit_ms: Optional wall-clock budget in milliseconds.
+            virtual_loss: Loss temporarily added to each node on an in-flight path.
+        """
+        if not self.engine:
+            return {"error": "MCTS engine not initialized."}
+        busy = self._busy_error()
+        if busy:
+            return {"error": busy}
+        try:
+            result = run_tree_parallel(self.engine, exploration_constant, num_threads, num_rounds, time_limit_ms, virtual_loss)
+            self.engine.enforce_memory_budget()
+        except Exception as e:
+            return {"error": f"Tree-parallel analysis failed: {e}"}
+
+        self._update_simulation_state()
         return {
-            "status": f"Successfully executed a batch of {num_rounds} rounds.",
+            "status": f"Executed {sum(result['worker_rounds'])} rounds on {result['num_threads']} threads.",
+            "worker_rounds": result["worker_rounds"],
             "total_root_visits": self.engine.root.numVisits,
             "simulation_stats": self.simulation_state
         }
 
+    def run_multi_slot_analysis(self, exploration_constant: float, slot_ids: List[str] | None = None, num_rounds: int | None = 100, time_limit_ms: float | None = None, seed: int | None = None) -> Dict[str, Any]:
+        """
+        Searches several slots concurrently, each in its own worker process, e.g. the
+        predicted opponent replies or the spatial sub-zones of a ligand search. The
+        wall time is that of the slowest slot instead of the sum over all slots.
+        With a slot memory budget (see `set_slot_memory_budget`), the slots are
+        searched in consecutive batches whose estimated size fits the budget, and
+        spilled slots are only reloaded for their batch.
+
+        Args:
+            exploration_constant: MCTS exploration factor.
+            slot_ids: Slots to search (defaults to every slot).
+            num_rounds: Rounds per slot. Set to None to run for `time_limit_ms` only.
+            time_limit_ms: Optional wall-clock budget per slot in milliseconds.
+            seed: Optional base seed; the i-th slot uses seed + i.
+        """
+        slot_ids = slot_ids or self.slots.list_slots()
+        for slot_id in slot_ids:
+            if slot_id not in self.slots.slots and not self.slots.is_spilled(slot_id):
+                return {"error": f"Slot '{slot_id}' not found."}
+            busy = self._slot_busy_error(slot_id)
+            if busy:
+                return {"error": busy}
+
+        results = {}
+        batches = self._multi_slot_batches(slot_ids)
+        base_seed = seed if seed is not None else random.randrange(2**31)
+        offset = 0
+        for batch in batches:
+            self.searching_slots = set(batch)
+            try:
+                engines = {slot_id: self.slots.get_slot(slot_id) for slot_id in batch}
+                batch_results = run_slots_parallel(engines, exploration_constant, num_rounds, time_limit_ms, base_seed + offset)
+                del engines
+                for slot_id, (engine, _, _) in batch_results.items():
+                    self.slots.set_slot(slot_id, engine)
+            except Exception as e:
+                return {"error": f"Multi-slot analysis failed: {e}"}
+            finally:
+                self.searching_slots = set()
+            results.update(batch_results)
+            offset += len(batch)
+
+        summaries = {}
+        for slot_id, (engine, rounds, elapsed_ms) in results.items():
+            summary = {"rounds_executed": rounds, "elapsed_ms": elapsed_ms, "total_root_visits": engine.root.numVisits}
+            if engine.root.children:
+                best_child = engine.getBestChild(engine.root, 0)
+                action = engine.getAction(engine.root, best_child)
+                summary["best_move"] = str(action) if action is not None else None
+                summary["best_value"] = best_child.totalReward / best_child.numVisits if best_child.numVisits else 0.0
+            summaries[slot_id] = summary
+        self.slots.enforce_budget()
+        return {
+            "status": f"Searched {len(results)} slots in {len(batches)} concurrent batch(es).",
+            "batches": batches,
+            "slot_summaries": summaries
+        }
+
+    def _multi_slot_batches(self, slot_ids: List[str]) -> List[List[str]]:
+        """
+        Splits `slot_ids` into consecutive batches whose estimated size fits the slot
+        memory budget next to the slots that cannot be spilled (the active slot and
+        slots of background jobs). A slot larger than the budget is searched alone.
+        """
+        if self.slots.max_bytes is None:
+            return [list(slot_ids)]
+        pinned = {
+            slot_id: engine.estimated_bytes() for slot_id, engine in self.slots.slots.items()
+            if slot_id == self.slots.active_slot or self._busy_error(engine)
+        }
+        capacity = self.slots.max_bytes - sum(pinned.values())
+        batches: List[List[str]] = []
+        used = 0
+        for slot_id in slot_ids:
+            size = 0 if slot_id in pinned else self.slots.slot_bytes(slot_id)
+            if not batches or used + size > capacity:
+                batches.append([])
+                used = 0
+            batches[-1].append(slot_id)
+            used += size
+        return batches
+
+    def start_mcts_analysis(self, exploration_constant: float, num_rounds: int | None = 1000, time_limit_ms: float | None = None, actions_to_expand: List[str] | None = None) -> Dict[str, Any]:
+        """
+        Starts a background analysis of the active slot and returns immediately with a
+        job id. Poll progress with `get_job_status` and stop early with `cancel_job`.
+        Tools that search or replace the slot reject it until the job has finished;
+        tools that read or save its tree wait for the job's current round.
+
+        Args:
+            exploration_constant: MCTS exploration factor.
+            num_rounds: Maximum number of rounds. May be None if `time_limit_ms` is given.
+            time_limit_ms: Optional wall-clock budget in milliseconds.
+            actions_to_expand: Optional list of actions to focus the search on.
+        """
+        if not self.engine:
+            return {"error": "MCTS engine not initialized."}
+        busy = self._busy_error()
+        if busy:
+            return {"error": busy}
+        try:
+            root_mask, unmatched = self._resolve_actions_to_expand(actions_to_expand)
+            job = AnalysisJob(self.engine, self.slots.active_slot, exploration_constant, num_rounds, time_limit_ms, root_mask)
+        except Exception as e:
+            return {"error": f"Failed to start background analysis: {e}"}
+        self._evict_finished_jobs()
+        self.jobs[job.job_id] = job
+        job.start()
+        result = {"status": f"Background analysis started on slot '{job.slot_id}'.", "job_id": job.job_id}
+        if unmatched:
+            result["unmatched_actions"] = unmatched
+        return result
+
+    def _evict_finished_jobs(self):
+        """Forgets the oldest finished jobs beyond MAX_FINISHED_JOBS, e.g. jobs nobody polled."""
+        finished = [job_id for job_id, job in self.jobs.items() if not job.running]
+        for job_id in finished[:max(len(finished) - self.MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    def _final_status(self, job: AnalysisJob) -> Dict[str, Any]:
+        """Returns the job's status, forgetting the job once the status is final."""
+        status = job.status()
+        if status["state"] not in ("pending", "running"):
+            self.jobs.pop(job.job_id, None)
+        return status
+
+    def get_job_status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Reports the progress of a background analysis: its state ("running",
+        "completed", "cancelled" or "failed"), rounds done, rounds per second and the
+        current best move with its visits and mean value. Once a finished state has
+        been reported, the job is forgotten and its id is no longer found.
+        """
+        job = self.jobs.get(job_id)
+        if not job:
+            return {"error": f"Job '{job_id}' not found."}
+        return self._final_status(job)
+
+    def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """Stops a background analysis after its current round and returns its final status."""
+        job = self.jobs.get(job_id)
+        if not job:
+            return {"error": f"Job '{job_id}' not found."}
+        job.cancel()
+        job.join()
+        return self._final_status(job)
+
     def get_best_move(self) -> Dict[str, Any]:
         """Retrieves the best move found so far."""
-        if not self.engine or not self.engine.root.children:
+        engine = self.engine
+        if not engine:
             return {"error": "No search performed yet."}
-        best_child = self.engine.getBestChild(self.engine.root, 0)
-        for action, node in self.engine.root.children.items():
-            if node is best_child:
-                return {"best_move": str(action)}
+        with self._job_lock(engine):
+            if not engine.root.children:
+                return {"error": "No search performed yet."}
+            best_child = engine.getBestChild(engine.root, 0)
+            action = engine.getAction(engine.root, best_child)
+        if action is not None:
+            return {"best_move": str(action)}
         return {"error": "Could not determine best move."}
 
     def get_simulation_stats(self) -> Dict[str, Any]:
         """Returns the current state of the simulation variables."""
         return self.simulation_state
 
+    def get_performance_profile(self, slot_id: str | None = None, reset: bool = False) -> Dict[str, Any]:
+        """
+        Reports where search time goes: cumulative time, calls and share per phase
+        (selection, expansion, simulation, backpropagation, pruning), mean rollout
+        length, evaluations per second, transposition-table hit rate and game
+        counters such as MOPAC calls, plus the server's own overhead.
+
+        Args:
+            slot_id: Slot to report on (defaults to the active slot).
+            reset: Clear the counters after reporting.
+        """
+        slot_id = slot_id or self.slots.active_slot
+        engine = self.slots.get_slot(slot_id)
+        if not engine:
+            return {"error": f"Slot '{slot_id}' not found."}
+        with self._job_lock(engine):
+            report = {"slot_id": slot_id, "engine": engine.performance_profile(), "server": self.profile.snapshot()}
+            if reset:
+                engine.profile.reset()
+                self.profile.reset()
+        return report
+
     def get_possible_actions(self) -> Dict[str, Any]:
         """Retrieves the list of all possible actions from the current root state."""
         if not self.engine:
@@ -200,33 +730,18 @@ class AiGpSimulator:
         """
         Retrieves the principal variation (best sequence of moves) from the root.
         """
-        if not self.engine or not self.engine.root:
+        engine = self.engine
+        if not engine or not engine.root:
             return {"error": "MCTS engine not initialized."}
 
-        path = []
-        node = self.engine.root
-        while node.children:
-            best_child = self.engine.getBestChild(node, 0)
-            if not best_child:
-                break
-            
-            found_action = None
-            for action, child_node in node.children.items():
-                if child_node is best_child:
-                    found_action = action
-                    break
-            
-            if found_action:
-                path.append(str(found_action))
-                node = best_child
-            else:
-                # Should not happen if best_child is found
-                break
-        
-        final_state = node.state
-        final_score = node.totalReward / node.numVisits if node.numVisits > 0 else 0
-        
-        summary = final_state.get_state_summary()
+        with self._job_lock(engine):
+            line = engine.principal_variation()
+            path = [str(action) for action, _ in line]
+            node = line[-1][1] if line else engine.root
+
+            final_state = node.state
+            final_score = node.totalReward / node.numVisits if node.numVisits > 0 else 0
+            summary = final_state.get_state_summary()
         
         # Include spatial zone metadata if it's a ligand game (Task-015)
         if hasattr(final_state, 'evaluator') and final_state.evaluator.spatial_zone:
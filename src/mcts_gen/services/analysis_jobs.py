@@ -0,0 +1,108 @@
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .mcts_engine import McpMcts
+
+
+class AnalysisJob:
+    """
+    Runs MCTS rounds on one engine in a background thread.
+
+    The job holds `lock` for the duration of each round, so status queries see
+    a consistent tree and wait at most one round. Cancellation is checked
+    between rounds.
+    """
+
+    def __init__(self, engine: McpMcts, slot_id: str, exploration_constant: float,
+                 num_rounds: Optional[int] = None, time_limit_ms: Optional[float] = None,
+                 root_mask: Optional[List[Any]] = None):
+        if num_rounds is None and not time_limit_ms:
+            raise ValueError("Either num_rounds or time_limit_ms must be given.")
+        self.job_id = uuid.uuid4().hex[:12]
+        self.engine = engine
+        self.slot_id = slot_id
+        self.exploration_constant = exploration_constant
+        self.num_rounds = num_rounds
+        self.time_limit_ms = time_limit_ms
+        self.root_mask = root_mask # Resolved actions_to_expand, applied every round
+        self.lock = threading.Lock()
+        self.rounds = 0
+        self.state = "pending"
+        self.stop_reason: Optional[str] = None
+        self.error: Optional[str] = None
+        self.started_at = 0.0
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"mcts-job-{self.job_id}", daemon=True)
+
+    @property
+    def running(self) -> bool:
+        return self.state in ("pending", "running")
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self.state = "running"
+        self._thread.start()
+
+    def cancel(self):
+        """Requests the job to stop after the current round."""
+        self._cancel.set()
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        deadline = self.started_at + self.time_limit_ms / 1000 if self.time_limit_ms else None
+        engine = self.engine
+        try:
+            while True:
+                if self._cancel.is_set():
+                    self.stop_reason = "cancelled"
+                    break
+                if self.num_rounds is not None and self.rounds >= self.num_rounds:
+                    self.stop_reason = "num_rounds"
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    self.stop_reason = "time_limit"
+                    break
+                with self.lock:
+                    engine.pruned_actions = self.root_mask
+                    try:
+                        engine.run_round(self.exploration_constant)
+                    finally:
+                        engine.pruned_actions = None
+                    engine.enforce_memory_budget()
+                    self.rounds += 1
+            self.state = "cancelled" if self.stop_reason == "cancelled" else "completed"
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def status(self) -> Dict[str, Any]:
+        """Returns progress and the current best root move."""
+        with self.lock:
+            elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+            result: Dict[str, Any] = {
+                "job_id": self.job_id,
+                "slot_id": self.slot_id,
+                "state": self.state,
+                "rounds_done": self.rounds,
+                "elapsed_ms": elapsed * 1000,
+                "rounds_per_second": self.rounds / elapsed if elapsed > 0 else 0.0,
+                "total_root_visits": self.engine.root.numVisits,
+            }
+            if self.engine.root.children:
+                best_child = self.engine.getBestChild(self.engine.root, 0)
+                action = self.engine.getAction(self.engine.root, best_child)
+                result["best_move"] = str(action) if action is not None else None
+                result["best_visits"] = best_child.numVisits
+                result["best_value"] = best_child.totalReward / best_child.numVisits if best_child.numVisits else 0.0
+        if self.stop_reason:
+            result["stop_reason"] = self.stop_reason
+        if self.error:
+            result["error"] = self.error
+        return result
@@ -0,0 +1,335 @@
+import math
+import random
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..models.game_state import GameStateBase
+
+
+class ArrayTree:
+    """
+    Stores the statistics of a search tree in preallocated, growable NumPy arrays.
+
+    Each node is a row index. The children of a node occupy a contiguous block of
+    rows that is reserved when the node's actions are first generated, so UCT
+    selection over the children is a single vectorized argmax. Rows of children
+    that have not been expanded yet only hold their incoming action.
+
+    The child with the best mean reward is cached per node and kept up to date
+    during backpropagation; it is recomputed only after its own mean drops.
+    """
+
+    def __init__(self, root_state: GameStateBase, capacity: int = 1024):
+        self.size = 0
+        self.capacity = 0
+        self.parent = np.empty(0, dtype=np.int32)
+        self.first_child = np.empty(0, dtype=np.int32)
+        self.num_children = np.empty(0, dtype=np.int32)  # expanded children
+        self.num_actions = np.empty(0, dtype=np.int32)   # -1 until actions are generated
+        self.visits = np.empty(0, dtype=np.int64)
+        self.total_reward = np.empty(0, dtype=np.float64)
+        self.value = np.empty(0, dtype=np.float64)       # MCTS-Solver value, NaN for None
+        self.terminal = np.empty(0, dtype=np.bool_)
+        self.best = np.empty(0, dtype=np.int32)            # cached best child row, -1 if unknown
+        self.best_value = np.empty(0, dtype=np.float64)   # mean reward of the cached best child
+        self.actions: List[Any] = []                      # incoming action of each row
+        self.states: List[Optional[GameStateBase]] = []
+        self._grow(max(capacity, 1))
+
+        self.size = 1
+        self.num_nodes = 1 # Rows holding an expanded state
+        self.states[0] = root_state
+        self.terminal[0] = root_state.isTerminal()
+
+    def _grow(self, min_capacity: int):
+        """Enlarges every array to at least `min_capacity` rows (doubling)."""
+        new_capacity = max(min_capacity, self.capacity * 2)
+        extra = new_capacity - self.capacity
+
+        def extend(arr, fill):
+            return np.concatenate([arr, np.full(extra, fill, dtype=arr.dtype)])
+
+        self.parent = extend(self.parent, -1)
+        self.first_child = extend(self.first_child, -1)
+        self.num_children = extend(self.num_children, 0)
+        self.num_actions = extend(self.num_actions, -1)
+        self.visits = extend(self.visits, 0)
+        self.total_reward = extend(self.total_reward, 0.0)
+        self.value = extend(self.value, np.nan)
+        self.terminal = extend(self.terminal, False)
+        self.best = extend(self.best, -1)
+        self.best_value = extend(self.best_value, 0.0)
+        self.actions.extend([None] * extra)
+        self.states.extend([None] * extra)
+        self.capacity = new_capacity
+
+    def node(self, index: int) -> "ArrayNode":
+        """Returns a lightweight node view for the given row."""
+        return ArrayNode(self, index)
+
+    def is_fully_expanded(self, index: int) -> bool:
+        """A node is fully expanded once every generated action has a child state."""
+        if self.terminal[index]:
+            return True
+        n_actions = self.num_actions[index]
+        return n_actions >= 0 and self.num_children[index] >= n_actions
+
+    def reserve_children(self, index: int, actions: List[Any]):
+        """Reserves a contiguous block of child rows for the given actions."""
+        n = len(actions)
+        if self.size + n > self.capacity:
+            self._grow(self.size + n)
+        start = self.size
+        self.first_child[index] = start
+        self.num_actions[index] = n
+        self.parent[start:start + n] = index
+        self.actions[start:start + n] = actions
+        self.size += n
+
+    def expand(self, index: int, preferred: Optional[List[Any]] = None, restrict: bool = True) -> int:
+        """
+        Creates the state of the next untried child of `index` and returns its row.
+        If `preferred` actions are given, the first untried one among them is
+        expanded instead of the next one in generation order, and with `restrict`
+        the node counts as fully expanded once none of them is left untried.
+        """
+        if self.num_actions[index] < 0:
+            self.reserve_children(index, self.states[index].getPossibleActions())
+
+        start = int(self.first_child[index])
+        cursor = start + int(self.num_children[index])
+        end = start + int(self.num_actions[index])
+        if cursor >= end:
+            raise Exception("Should never reach here")
+
+        matched = False
+        if preferred:
+            wanted = set(preferred)
+            rows = [row for row in range(cursor, end) if self.actions[row] in wanted]
+            if rows:
+                # Swap the preferred action into the cursor position; untried rows only hold actions.
+                row = rows[0]
+                self.actions[cursor], self.actions[row] = self.actions[row], self.actions[cursor]
+                matched = True
+
+        self.states[index].materialize()
+        state = self.states[index].takeAction(self.actions[cursor])
+        self.states[cursor] = state
+        self.terminal[cursor] = state.isTerminal()
+        self.num_children[index] += 1
+        self.num_nodes += 1
+        # A pruned list restricts the node to those actions once they are all expanded.
+        if restrict and matched and len(rows) == 1:
+            self.num_actions[index] = self.num_children[index]
+        return cursor
+
+    def child_rows(self, index: int) -> range:
+        """Returns the rows of the expanded children of `index`."""
+        start = int(self.first_child[index])
+        if start < 0:
+            return range(0)
+        return range(start, start + int(self.num_children[index]))
+
+    def best_child(self, index: int, exploration_value: float) -> int:
+        """Selects the child row with the highest UCT value in one vectorized pass."""
+        start = int(self.first_child[index])
+        end = start + int(self.num_children[index])
+        visits = self.visits[start:end].astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = self.total_reward[start:end] / visits
+            if exploration_value:
+                scores = scores + exploration_value * np.sqrt(2 * math.log(max(self.visits[index], 1)) / visits)
+        # Unvisited children are tried first when exploring and ignored when exploiting.
+        scores = np.where(visits > 0, scores, np.inf if exploration_value else -np.inf)
+        best = np.flatnonzero(scores == scores.max())
+        return start + int(random.choice(best))
+
+    def backpropagate(self, index: int, reward: float):
+        """Adds a visit and the reward to `index` and all of its ancestors."""
+        child = -1
+        while index >= 0:
+            self.visits[index] += 1
+            self.total_reward[index] += reward
+            if child >= 0:
+                self.update_best(index, child)
+            child, index = index, int(self.parent[index])
+
+    def update_best(self, index: int, child: int):
+        """Updates the cached best child of `index` after the statistics of `child` changed."""
+        best = self.best[index]
+        if best < 0:
+            return
+        visits = self.visits[child]
+        if best == child:
+            mean = self.total_reward[child] / visits if visits > 0 else -np.inf
+            if mean >= self.best_value[index]:
+                self.best_value[index] = mean
+            else:
+                self.best[index] = -1 # Recomputed when next requested
+        elif visits > 0:
+            mean = self.total_reward[child] / visits
+            if mean > self.best_value[index]:
+                self.best[index] = child
+                self.best_value[index] = mean
+
+    def best_row(self, index: int) -> int:
+        """Returns the visited child of `index` with the best mean reward, or -1."""
+        best = int(self.best[index])
+        if best >= 0:
+            return best
+        rows = self.child_rows(index)
+        if not rows or not self.visits[rows.start:rows.stop].any():
+            return -1
+        best = self.best_child(index, 0)
+        self.best[index] = best
+        self.best_value[index] = self.total_reward[best] / self.visits[best]
+        return best
+
+    def subtree(self, index: int, min_visits: int = 0) -> "ArrayTree":
+        """
+        Returns a new, compact ArrayTree holding only the subtree rooted at `index`.
+        Expanded children with fewer than `min_visits` visits are dropped together
+        with their subtrees and become the last untried actions of their parent.
+        """
+        tree = ArrayTree(self.states[index], capacity=max(1024, int(self.num_children[index]) * 2))
+        self._copy_row(tree, index, 0)
+        queue = [(index, 0)]
+        while queue:
+            old, new = queue.pop()
+            if self.num_actions[old] < 0:
+                continue
+            old_start = int(self.first_child[old])
+            n_children = int(self.num_children[old])
+            n_actions = int(self.num_actions[old])
+            expanded = range(old_start, old_start + n_children)
+            kept = [row for row in expanded if self.visits[row] >= min_visits]
+            dropped = [row for row in expanded if self.visits[row] < min_visits]
+            # Never-tried actions come before the dropped ones, which are expanded again last.
+            actions = ([self.actions[row] for row in kept] + self.actions[old_start + n_children:old_start + n_actions]
+                       + [self.actions[row] for row in dropped])
+            tree.reserve_children(new, actions)
+            new_start = int(tree.first_child[new])
+            tree.num_children[new] = len(kept)
+            for k, row in enumerate(kept):
+                self._copy_row(tree, row, new_start + k)
+                queue.append((row, new_start + k))
+        tree.num_nodes = 1 + int(tree.num_children[:tree.size].sum())
+        tree._trim()
+        return tree
+
+    def _trim(self):
+        """Releases the unused rows beyond `size`, so a pruned copy is sized to its contents."""
+        for name in ("parent", "first_child", "num_children", "num_actions", "visits",
+                     "total_reward", "value", "terminal", "best", "best_value"):
+            setattr(self, name, getattr(self, name)[:self.size].copy())
+        del self.actions[self.size:]
+        del self.states[self.size:]
+        self.capacity = self.size
+
+    @classmethod
+    def from_nodes(cls, root: Any) -> "ArrayTree":
+        """
+        Builds an ArrayTree from a tree of MCTSNode objects. Untried actions are
+        kept after the expanded children of each block. Nodes shared through
+        transpositions are copied once per parent.
+        """
+        tree = cls(root.state)
+        queue = [(root, 0)]
+        while queue:
+            node, index = queue.pop()
+            tree.visits[index] = node.numVisits
+            tree.total_reward[index] = node.totalReward
+            tree.value[index] = np.nan if node.value is None else node.value
+            if not node.children and node.untried_actions is None:
+                continue
+            children = list(node.children.items())
+            untried = list(node.untried_actions or {})[::-1]
+            tree.reserve_children(index, [action for action, _ in children] + untried)
+            start = int(tree.first_child[index])
+            tree.num_children[index] = len(children)
+            for k, (_, child) in enumerate(children):
+                tree.states[start + k] = child.state
+                tree.terminal[start + k] = child.isTerminal
+                queue.append((child, start + k))
+        tree.num_nodes = 1 + int(tree.num_children[:tree.size].sum())
+        return tree
+
+    def _copy_row(self, tree: "ArrayTree", src: int, dst: int):
+        """Copies the statistics and state of row `src` into row `dst` of `tree`."""
+        tree.visits[dst] = self.visits[src]
+        tree.total_reward[dst] = self.total_reward[src]
+        tree.value[dst] = self.value[src]
+        tree.terminal[dst] = self.terminal[src]
+        tree.states[dst] = self.states[src]
+
+    def nbytes(self) -> int:
+        """Estimated memory used by the statistic arrays and row pointers."""
+        arrays = (self.parent, self.first_child, self.num_children, self.num_actions,
+                  self.visits, self.total_reward, self.value, self.terminal, self.best, self.best_value)
+        return sum(a.nbytes for a in arrays) + 8 * (len(self.actions) + len(self.states))
+
+
+class ArrayNode:
+    """
+    A view of one row of an ArrayTree that exposes the attributes of
+    AntLionTreeNode, so the inherited MCTS-Solver logic works unchanged.
+    """
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree: ArrayTree, index: int):
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ArrayNode) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    @property
+    def state(self) -> GameStateBase:
+        return self.tree.states[self.index]
+
+    @property
+    def parent(self) -> Optional["ArrayNode"]:
+        p = self.tree.parent[self.index]
+        return ArrayNode(self.tree, int(p)) if p >= 0 else None
+
+    @property
+    def isTerminal(self) -> bool:
+        return bool(self.tree.terminal[self.index])
+
+    @property
+    def isFullyExpanded(self) -> bool:
+        return self.tree.is_fully_expanded(self.index)
+
+    @property
+    def numVisits(self) -> int:
+        return int(self.tree.visits[self.index])
+
+    @numVisits.setter
+    def numVisits(self, value: int):
+        self.tree.visits[self.index] = value
+
+    @property
+    def totalReward(self) -> float:
+        return float(self.tree.total_reward[self.index])
+
+    @totalReward.setter
+    def totalReward(self, value: float):
+        self.tree.total_reward[self.index] = value
+
+    @property
+    def value(self) -> Optional[float]:
+        v = self.tree.value[self.index]
+        return None if np.isnan(v) else float(v)
+
+    @value.setter
+    def value(self, v: Optional[float]):
+        self.tree.value[self.index] = np.nan if v is None else v
+
+    @property
+    def children(self) -> Dict[Any, "ArrayNode"]:
+        """Expanded children keyed by action (built on demand)."""
+        return {self.tree.actions[row]: ArrayNode(self.tree, row) for row in self.tree.child_rows(self.index)}
@@ -0,0 +1,232 @@
+"""
+Compact on-disk checkpoints of search trees.
+
+A checkpoint is a single binary file:
+
+    MAGIC (8 bytes) | header length (uint64) | JSON header | aligned sections
+
+The sections hold the node statistic arrays of an ArrayTree, an interned
+action table (each distinct action is pickled once and rows refer to it by
+id), the pickled root state, and one compact record per expanded node
+produced by GameStateBase.to_compact (FEN, SFEN, binary Mol, ...).
+
+Restoring memory-maps the file copy-on-write, so the arrays are paged in on
+demand, and node states are rebuilt from their records only when accessed.
+Engines that use options of the node backend only (transpositions, compact
+states, batched expansion) are restored as node trees instead, with every
+state decoded on load, so no option is lost.
+
+The root state and the actions are pickled, so checkpoints must only be read
+from trusted locations. The magic and version fields are checked before
+anything is unpickled.
+"""
+import json
+import pickle
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.game_state import GameStateBase
+from .array_tree import ArrayTree
+from .mcts_engine import McpMcts
+
+MAGIC = b"MCTSGEN1"
+VERSION = 1
+ALIGNMENT = 64
+
+_NODE_ONLY_OPTIONS = ("transposition_table", "compact_states", "expansion_batch_size")
+_ARRAY_FIELDS = ("parent", "first_child", "num_children", "num_actions", "visits", "total_reward", "value", "terminal")
+_PENDING = object()
+
+
+class LazyStateList(list):
+    """A list of states that decodes checkpointed states on first access."""
+
+    def __init__(self, size: int, decode: Callable[[int], Optional[GameStateBase]]):
+        super().__init__([_PENDING] * size)
+        self._decode = decode
+
+    def __getitem__(self, index):
+        value = super().__getitem__(index)
+        if value is _PENDING:
+            value = self._decode(index)
+            super().__setitem__(index, value)
+        return value
+
+    def __reduce__(self):
+        # Pickle as a plain list of decoded states (the decoder holds a memory map).
+        return list, ([self[i] for i in range(len(self))],)
+
+
+def save_engine(engine: McpMcts, path: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Writes the tree below `engine.root` to `path`.
+
+    Returns:
+        A summary with the number of nodes, distinct actions and bytes written.
+    """
+    if engine.tree is not None:
+        tree = engine.tree.subtree(engine.root.index)
+    else:
+        tree = ArrayTree.from_nodes(engine.root)
+    n = tree.size
+
+    action_ids = np.full(n, -1, dtype=np.int32)
+    table: Dict[bytes, int] = {}
+    for row in range(1, n):
+        key = pickle.dumps(tree.actions[row])
+        action_ids[row] = table.setdefault(key, len(table))
+
+    records: List[bytes] = []
+    state_offsets = np.zeros(n + 1, dtype=np.int64)
+    root_state = tree.states[0]
+    for row in range(n):
+        state = tree.states[row]
+        record = state.to_compact() if (state is not None and row > 0) else b""
+        records.append(record)
+        state_offsets[row + 1] = state_offsets[row] + len(record)
+
+    sections: Dict[str, bytes] = {name: getattr(tree, name)[:n].tobytes() for name in _ARRAY_FIELDS}
+    sections["action_ids"] = action_ids.tobytes()
+    sections["state_offsets"] = state_offsets.tobytes()
+    sections["state_records"] = b"".join(records)
+    sections["actions"] = pickle.dumps(list(table))
+    sections["root_state"] = pickle.dumps(root_state)
+
+    header: Dict[str, Any] = {
+        "version": VERSION,
+        "size": n,
+        "num_nodes": tree.num_nodes,
+        "dtypes": {name: getattr(tree, name).dtype.str for name in _ARRAY_FIELDS},
+        "engine": engine.config(),
+        "metadata": metadata or {},
+        "sections": {},
+    }
+    # Offsets depend on the header length, so lay the sections out after a padded header.
+    offset = 0
+    for name, data in sections.items():
+        header["sections"][name] = [offset, len(data)]
+        offset += _padded(len(data))
+    header_bytes = json.dumps(header).encode()
+    data_start = _padded(len(MAGIC) + 8 + len(header_bytes))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - f.tell()))
+        for name, data in sections.items():
+            f.write(data)
+            f.write(b"\0" * (_padded(len(data)) - len(data)))
+        total = f.tell()
+
+    return {"nodes": tree.num_nodes, "distinct_actions": len(table), "bytes": total}
+
+
+def load_engine(path: str) -> McpMcts:
+    """
+    Restores an engine from a trusted checkpoint written by `save_engine`. The
+    tree is restored with the array backend; its arrays are memory-mapped
+    copy-on-write and node states are decoded lazily. Engines saved with
+    node-only options get the node backend back, with all states decoded.
+    """
+    header, header_len = _read_header(path)
+    data_start = _padded(len(MAGIC) + 8 + header_len)
+    sections = header["sections"]
+    n = header["size"]
+
+    def mapped(name: str, dtype: Any) -> np.ndarray:
+        offset, length = sections[name]
+        count = length // np.dtype(dtype).itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="c", offset=data_start + offset, shape=(count,))
+
+    def blob(name: str) -> bytes:
+        offset, length = sections[name]
+        with open(path, "rb") as f:
+            f.seek(data_start + offset)
+            return f.read(length)
+
+    root_state: GameStateBase = pickle.loads(blob("root_state"))
+    action_table = [pickle.loads(a) for a in pickle.loads(blob("actions"))]
+    action_ids = mapped("action_ids", np.int32)
+    state_offsets = mapped("state_offsets", np.int64)
+    records = mapped("state_records", np.uint8)
+
+    def decode(row: int) -> Optional[GameStateBase]:
+        if row == 0:
+            return root_state
+        if row >= n:
+            return None
+        start, end = int(state_offsets[row]), int(state_offsets[row + 1])
+        if start == end:
+            return None
+        return root_state.from_compact(records[start:end].tobytes())
+
+    tree = ArrayTree.__new__(ArrayTree)
+    for name in _ARRAY_FIELDS:
+        setattr(tree, name, mapped(name, header["dtypes"][name]))
+    tree.size = tree.capacity = n
+    tree.best = np.full(n, -1, dtype=np.int32)
+    tree.best_value = np.zeros(n, dtype=np.float64)
+    tree.num_nodes = header["num_nodes"]
+    tree.actions = [action_table[i] if i >= 0 else None for i in action_ids.tolist()]
+    tree.states = LazyStateList(n, decode)
+
+    config = header["engine"]
+    if any(config.get(option) for option in _NODE_ONLY_OPTIONS):
+        engine = McpMcts(initial_state=root_state, **{**config, "tree_backend": "node"})
+        _restore_nodes(engine, tree)
+        return engine
+    engine = McpMcts(initial_state=root_state, **{**config, "tree_backend": "array"})
+    engine.tree = tree
+    engine.root = tree.node(0)
+    return engine
+
+
+def _restore_nodes(engine: McpMcts, tree: ArrayTree):
+    """Rebuilds the node tree of `engine` (whose root holds the root state) from an ArrayTree."""
+    queue = [(0, engine.root)]
+    while queue:
+        row, node = queue.pop()
+        node.numVisits = int(tree.visits[row])
+        node.totalReward = float(tree.total_reward[row])
+        node.value = None if np.isnan(tree.value[row]) else float(tree.value[row])
+        if tree.num_actions[row] < 0:
+            continue
+        start = int(tree.first_child[row])
+        n_children, n_actions = int(tree.num_children[row]), int(tree.num_actions[row])
+        for child_row in range(start, start + n_children):
+            action = tree.actions[child_row]
+            child = engine._make_node(tree.states[child_row], node)
+            child.action = action
+            node.children[action] = child
+            queue.append((child_row, child))
+        untried = tree.actions[start + n_children:start + n_actions]
+        node.untried_actions = dict.fromkeys(reversed(untried)) if untried else None
+        node.isFullyExpanded = n_children >= n_actions
+    engine._recount_nodes()
+    if engine.transpositions is not None:
+        engine._index_transpositions()
+
+
+def read_metadata(path: str) -> Dict[str, Any]:
+    """Returns the user metadata stored in a checkpoint header."""
+    return _read_header(path)[0]["metadata"]
+
+
+def _read_header(path: str) -> Tuple[Dict[str, Any], int]:
+    """Reads and validates the JSON header of a checkpoint, returning it with its length."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an mcts-gen checkpoint.")
+        header_len = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_len).decode())
+    if header.get("version") != VERSION:
+        raise ValueError(f"{path} has unsupported checkpoint version {header.get('version')!r}.")
+    return header, header_len
+
+
+def _padded(length: int) -> int:
+    return (length + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -1,11 +1,18 @@
 
+import itertools
 import math
 import random
-from typing import Dict, Any, Optional
+import time
+from multiprocessing import Lock
+from typing import Dict, Any, List, Optional, Tuple
 
 from mcts_solver.mcts_solver import AntLionMcts, AntLionTreeNode
 
 from ..models.game_state import GameStateBase
+from .array_tree import ArrayTree
+from .transposition_table import TranspositionTable
+from .profiling import SearchProfile
+from .state_cache import StateCache
 
 # ======================================================================
 # Node Class Definition
@@ -17,6 +24,37 @@ class MCTSNode(AntLionTreeNode):
     """
     def __init__(self, state, parent):
         super().__init__(state, parent)
+        # Actions not yet expanded, generated once and keyed in reverse order so the
+        # next one is popped (and a pruned one found and removed) in O(1). Released
+        # when the node is fully expanded.
+        self.untried_actions: Optional[Dict[Any, None]] = None
+        # Incoming action and the cached child with the best mean reward (None if unknown)
+        self.action: Any = None
+        self.best_child: Optional["MCTSNode"] = None
+        self.best_value = 0.0
+        # States of untried actions built ahead by batched expansion
+        self.prepared_states: Optional[Dict[Any, Any]] = None
+
+class CompactMCTSNode(MCTSNode):
+    """
+    An MCTSNode that does not own its state. The state lives in the engine's
+    StateCache and is rebuilt from the incoming action (and the ancestors'
+    actions or compact records) when it has been evicted.
+    """
+    def __init__(self, state, parent, cache: StateCache):
+        self.cache = cache
+        self._state = None
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.record = cache.record_for(state, self.depth)
+        super().__init__(state, parent)
+
+    @property
+    def state(self):
+        return self.cache.get(self)
+
+    @state.setter
+    def state(self, state):
+        self.cache.put(self, state)
 
 # ======================================================================
 # Engine Class Definition (Corrected Plan B)
@@ -24,44 +62,864 @@ class MCTSNode(AntLionTreeNode):
 class McpMcts(AntLionMcts):
     """
     An MCTS engine that uses UCT (from parent) and AI value estimation.
+
+    Two tree backends are available: "node" (default) keeps one MCTSNode object
+    per expansion, while "array" stores the statistics in an ArrayTree and
+    selects children with a vectorized UCT argmax, which is much cheaper on
+    wide trees such as ligand roots or chess middlegames.
+
+    With `transposition_table=True` (node backend only), states that share a
+    GameStateBase.get_state_key() are merged into one node, turning the tree
+    into a DAG. Rewards are then backpropagated along the selected path.
+
+    With `widening_constant` C set, progressive widening lets a node expand only
+    while it has fewer than C * N^widening_exponent children (N = its visits),
+    so searches over huge action spaces can go deep instead of wide.
+
+    With `max_nodes` and/or `max_bytes` set, enforce_memory_budget() prunes the
+    least-visited subtrees once the tree exceeds its budget. Their statistics
+    stay aggregated in the parent and their actions become untried again.
+
+    Each node caches its child with the best mean reward, updated along the
+    backpropagated path, so best-move and principal-variation queries follow
+    cached pointers instead of scanning every child (not with transpositions,
+    where a shared node's update would affect parents off the path).
+
+    With `rollout_depth` set, rollouts are cut off after that many plies and
+    scored with the game's static GameStateBase.evaluate_position().
+
+    With `expansion_batch_size` K set (node backend), expanding a node builds
+    the states of its next K untried actions with one GameStateBase.takeActions
+    call, e.g. generating ligand conformers for sibling actions in parallel.
+
+    With `compact_states=True` (node backend, no transpositions), nodes keep
+    only their incoming action and periodic compact records of their state;
+    a StateCache of `state_cache_size` states rebuilds the rest on demand by
+    replaying actions, so large trees are not bounded by state size.
+
+    `profile` accumulates the time spent in selection, expansion, simulation
+    and backpropagation, together with rollout and evaluation counters.
     """
 
+    NODE_OVERHEAD_BYTES = 400 # Rough size of an MCTSNode with its attribute and children dicts
+
     def __init__(self, initial_state: GameStateBase, **kwargs):
         """
         Initializes the MCTS engine.
         """
         super().__init__(iterationLimit=kwargs.get("iterationLimit", 100))
         self.explorationConstant = kwargs.get("explorationConstant", 1.4)
-        self.root = MCTSNode(initial_state, None)
+        self.tree_backend = kwargs.get("tree_backend", "node")
+        self.states: Optional[StateCache] = None
+        if kwargs.get("compact_states", False):
+            if self.tree_backend != "node" or kwargs.get("transposition_table", False):
+                raise ValueError("Compact state storage requires the 'node' tree backend without a transposition table.")
+            self.states = StateCache(
+                initial_state,
+                max_states=kwargs.get("state_cache_size", 10_000),
+                record_interval=kwargs.get("state_record_interval", 16),
+            )
+        if self.tree_backend == "array":
+            self.tree: Optional[ArrayTree] = ArrayTree(initial_state)
+            self.root = self.tree.node(0)
+        elif self.tree_backend == "node":
+            self.tree = None
+            self.root = self._make_node(initial_state, None)
+        else:
+            raise ValueError(f"Unknown tree_backend '{self.tree_backend}'. Use 'node' or 'array'.")
         self.value: Optional[float] = None
-        self.pruned_actions: Optional[List[str]] = None
-        self.pruned_actions: Optional[List[Any]] = None # Hook for AI policy pruning
+        self.profile = SearchProfile()
+        self.rollout = self._random_rollout
+        # Rollouts stop after this many plies and use GameStateBase.evaluate_position (None = play to the end)
+        self.rollout_depth: Optional[int] = kwargs.get("rollout_depth")
+        self.pruned_actions: Optional[List[Any]] = None # Hook for AI policy pruning of the root's next expansion
+
+        # Batched expansion: build the states of this many untried sibling actions at once (node backend)
+        self.expansion_batch_size: Optional[int] = kwargs.get("expansion_batch_size")
+        if self.expansion_batch_size is not None and self.tree_backend != "node":
+            raise ValueError("Batched expansion requires the 'node' tree backend.")
+
+        # Progressive widening: a node may have at most C * N^alpha children (disabled if C is None)
+        self.widening_constant: Optional[float] = kwargs.get("widening_constant")
+        self.widening_exponent: float = kwargs.get("widening_exponent", 0.5)
+
+        # Memory budget; the state size is a running average of sampled states
+        self.max_nodes: Optional[int] = kwargs.get("max_nodes")
+        self.max_bytes: Optional[int] = kwargs.get("max_bytes")
+        self.pruned_nodes = 0
+        self._node_count = 1
+        self._prepared_count = 0 # States held in prepared_states by batched expansion
+        self._unvisited: set = set() # Node-backend children left without visits by revert_virtual_loss
+        self._state_bytes = float(initial_state.estimate_nbytes())
+        self._state_samples = 1
+
+        self.transpositions: Optional[TranspositionTable] = None
+        self._path: Optional[List[MCTSNode]] = None # Selected path, needed to backpropagate through a DAG
+        if kwargs.get("transposition_table", False):
+            if self.tree is not None:
+                raise ValueError("The transposition table requires the 'node' tree backend.")
+            self.transpositions = TranspositionTable(
+                max_entries=kwargs.get("transposition_size", 100_000),
+                eviction=kwargs.get("transposition_eviction", "lru"),
+            )
+            self._index_transpositions()
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Returns the constructor options of this engine, so that
+        McpMcts(initial_state=..., **engine.config()) builds an equivalent empty
+        engine (e.g. for root-parallel workers or restored checkpoints).
+        """
+        return {
+            "iterationLimit": self.searchLimit,
+            "explorationConstant": self.explorationConstant,
+            "tree_backend": self.tree_backend,
+            "transposition_table": self.transpositions is not None,
+            "transposition_size": self.transpositions.max_entries if self.transpositions is not None else 100_000,
+            "transposition_eviction": self.transpositions.eviction if self.transpositions is not None else "lru",
+            "widening_constant": self.widening_constant,
+            "widening_exponent": self.widening_exponent,
+            "max_nodes": self.max_nodes,
+            "max_bytes": self.max_bytes,
+            "rollout_depth": self.rollout_depth,
+            "compact_states": self.states is not None,
+            "state_cache_size": self.states.max_states if self.states is not None else 10_000,
+            "state_record_interval": self.states.record_interval if self.states is not None else 16,
+            "expansion_batch_size": self.expansion_batch_size,
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The multiprocessing lock cannot be pickled; it is recreated on unpickling
+        # so engines (with their trees) can be sent to worker processes.
+        state = self.__dict__.copy()
+        del state["lock"]
+        if state.get("rollout") == self._random_rollout:
+            del state["rollout"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.lock = Lock()
+        self.__dict__.setdefault("rollout", self._random_rollout)
+
+    def run_round(self, explorationConstant: float) -> float:
+        """
+        Executes one select/expand/simulate/backpropagate round from the root and
+        records the time of each phase in `profile`.
+
+        Returns:
+            The reward that was backpropagated.
+        """
+        profile = self.profile
+        t0 = time.perf_counter()
+        expansion_before = profile.seconds("expansion")
+        node = self.selectNode_num(self.root, explorationConstant)
+        t1 = time.perf_counter()
+        reward = self.mctsSolver(node)
+        t2 = time.perf_counter()
+        self.backpropogate(node, reward)
+        t3 = time.perf_counter()
+        profile.add("selection", (t1 - t0) - (profile.seconds("expansion") - expansion_before))
+        profile.add("simulation", t2 - t1)
+        profile.add("backpropagation", t3 - t2)
+        profile.count("evaluations")
+        return reward
+
+    def _random_rollout(self, state) -> float:
+        """
+        Uniformly random playout (as mcts.randomPolicy) that records its length.
+        The leaf's materialize() hook runs first. Games that support
+        push/pop are played out on a single scratch copy.
+
+        With `rollout_depth` set, the playout stops after that many plies and
+        returns the game's static evaluate_position() estimate instead, unless
+        the game has none, in which case it continues to the end.
+        """
+        state.materialize()
+        steps = 0
+        depth = self.rollout_depth
+        in_place = getattr(state, "supports_push_pop", False)
+        if in_place:
+            state = state.scratch_copy()
+        while not state.isTerminal():
+            if depth is not None and steps >= depth:
+                estimate = state.evaluate_position()
+                if estimate is not None:
+                    self.profile.count("rollouts")
+                    self.profile.count("rollout_steps", steps)
+                    self.profile.count("rollout_cutoffs")
+                    return estimate
+                depth = None
+            try:
+                action = random.choice(state.getPossibleActions())
+            except IndexError:
+                raise Exception("Non-terminal state has no possible actions: " + str(state))
+            if in_place:
+                state.push(action)
+            else:
+                state = state.takeAction(action)
+            steps += 1
+        self.profile.count("rollouts")
+        self.profile.count("rollout_steps", steps)
+        return state.getReward()
 
     def expand(self, node: MCTSNode) -> MCTSNode:
         """
         Uses a pre-filtered list of actions if provided, otherwise gets all actions.
         """
-        actions = self.pruned_actions if self.pruned_actions is not None else node.state.getPossibleActions()
-        
-        # Clear the pruned list after using it for one expansion
-        self.pruned_actions = None
+        start = time.perf_counter()
+        try:
+            return self._expand(node)
+        finally:
+            self.profile.add("expansion", time.perf_counter() - start)
+
+    def _expand(self, node: MCTSNode) -> MCTSNode:
+        pruned = self._take_root_mask(node)
+        if self.tree is not None:
+            row = self.tree.expand(node.index, pruned)
+            self._note_new_state(self.tree.states[row])
+            return self.tree.node(row)
+
+        if node.untried_actions is None:
+            node.untried_actions = dict.fromkeys(reversed(node.state.getPossibleActions()))
+
+        action = None
+        if pruned:
+            action = next((a for a in pruned if a in node.untried_actions), None)
+        from_pruned = action is not None
+        if from_pruned:
+            del node.untried_actions[action]
+        elif node.untried_actions:
+            action, _ = node.untried_actions.popitem()
+        else:
+            raise Exception("Should never reach here")
+
+        newNode = self._new_child(node, action)
+        # A pruned list restricts the node to those actions once every one of them is expanded.
+        if not node.untried_actions or (from_pruned and all(a in node.children for a in pruned)):
+            node.isFullyExpanded = True
+            node.untried_actions = None
+            self._release_prepared(node)
+        return newNode
+
+    def _take_root_mask(self, node) -> Optional[List[Any]]:
+        """
+        Returns the pruned action list if `node` is the root, clearing it after
+        this one use. The list holds root actions, so other nodes ignore it.
+        """
+        if self.pruned_actions is None or node != self.root:
+            return None
+        pruned, self.pruned_actions = self.pruned_actions, None
+        return pruned
+
+    def expand_action(self, node, action: Any):
+        """
+        Returns the child of `node` reached by `action`, expanding it if needed.
+        Unlike pruned expansion, this never restricts the node's action set.
+        """
+        if self.tree is not None:
+            for row in self.tree.child_rows(node.index):
+                if self.tree.actions[row] == action:
+                    return self.tree.node(row)
+            row = self.tree.expand(node.index, [action], restrict=False)
+            self._note_new_state(self.tree.states[row])
+            return self.tree.node(row)
+
+        child = node.children.get(action)
+        if child is not None:
+            return child
+        if node.untried_actions is None:
+            node.untried_actions = dict.fromkeys(reversed(node.state.getPossibleActions()))
+        node.untried_actions.pop(action, None)
+        child = self._new_child(node, action)
+        if not node.untried_actions:
+            node.isFullyExpanded = True
+            node.untried_actions = None
+            self._release_prepared(node)
+        return child
+
+    def _child_state(self, node: MCTSNode, action: Any) -> GameStateBase:
+        """
+        Returns the state reached by `action`. With batched expansion, the states
+        of the next untried actions are built together by GameStateBase.takeActions
+        and kept on the node until those actions are expanded. The parent is
+        materialized first (see GameStateBase.materialize).
+        """
+        node.state.materialize()
+        if not self.expansion_batch_size or self.expansion_batch_size <= 1:
+            return node.state.takeAction(action)
+        if node.prepared_states and action in node.prepared_states:
+            self._prepared_count -= 1
+            return node.prepared_states.pop(action)
+        # untried_actions is keyed in reverse, so the next actions are at its end.
+        upcoming = (a for a in reversed(node.untried_actions or {}) if a != action)
+        batch = [action] + list(itertools.islice(upcoming, self.expansion_batch_size - 1))
+        states = node.state.takeActions(batch)
+        self._release_prepared(node)
+        node.prepared_states = dict(zip(batch[1:], states[1:]))
+        self._prepared_count += len(node.prepared_states)
+        return states[0]
+
+    def _release_prepared(self, node: MCTSNode):
+        """Drops the states built ahead for `node`, e.g. once it is fully expanded."""
+        if node.prepared_states:
+            self._prepared_count -= len(node.prepared_states)
+        node.prepared_states = None
+
+    def _new_child(self, node: MCTSNode, action: Any) -> MCTSNode:
+        """Creates (or links a transposition of) the child of `node` reached by `action`."""
+        newState = self._child_state(node, action)
+        newNode = self._lookup_transposition(newState)
+        if newNode is None:
+            newNode = self._make_node(newState, node)
+            newNode.action = action
+            self._note_new_state(newState)
+            if self.transpositions is not None:
+                key = newState.get_state_key()
+                if key is not None:
+                    self.transpositions.put(key, newNode)
+        node.children[action] = newNode
+        return newNode
+
+    def _make_node(self, state: GameStateBase, parent: Optional[MCTSNode]) -> MCTSNode:
+        """Creates a node-backend node; with compact states, a root keeps its state pinned."""
+        if self.states is None:
+            return MCTSNode(state, parent)
+        node = CompactMCTSNode(state, parent, self.states)
+        if parent is None:
+            self.states.pin(node)
+        return node
+
+    def _recount_nodes(self):
+        """Recounts the nodes (and compact record bytes) under the root after pruning or re-rooting."""
+        nodes = list(self._iter_nodes())
+        self._node_count = len(nodes)
+        self._prepared_count = sum(len(n.prepared_states or ()) for n in nodes)
+        self._unvisited.intersection_update(nodes)
+        if self.states is not None:
+            self.states.record_bytes = sum(len(n.record) for n in nodes if n.record is not None)
+
+    def _note_new_state(self, state: GameStateBase):
+        """Counts a new node and samples its state size every 64 nodes."""
+        self._node_count += 1
+        if self._node_count % 64 == 0:
+            self._state_samples += 1
+            self._state_bytes += (state.estimate_nbytes() - self._state_bytes) / self._state_samples
+
+    @property
+    def num_nodes(self) -> int:
+        """Number of nodes holding a state."""
+        return self.tree.num_nodes if self.tree is not None else self._node_count
+
+    def estimated_bytes(self) -> int:
+        """Estimated memory used by the tree, including its states and those built ahead by batched expansion."""
+        if self.tree is not None:
+            return int(self.tree.nbytes() + self.num_nodes * self._state_bytes)
+        prepared = self._prepared_count * self._state_bytes
+        if self.states is not None:
+            return int(self.num_nodes * self.NODE_OVERHEAD_BYTES + self.states.record_bytes
+                       + (len(self.states) + 1) * self._state_bytes + prepared)
+        return int(self.num_nodes * (self.NODE_OVERHEAD_BYTES + self._state_bytes) + prepared)
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Summarizes the tree size against its memory budget."""
+        return {
+            "nodes": self.num_nodes,
+            "estimated_bytes": self.estimated_bytes(),
+            "max_nodes": self.max_nodes,
+            "max_bytes": self.max_bytes,
+            "pruned_nodes": self.pruned_nodes,
+        }
+
+    def performance_profile(self) -> Dict[str, Any]:
+        """
+        Returns the per-phase timings and counters of `profile` with derived rates:
+        mean rollout length, leaf evaluations per second of profiled search time,
+        transposition-table hit rate and the game's own counters.
+        """
+        report = self.profile.snapshot()
+        counters = report["counters"]
+        rollouts = counters.get("rollouts", 0)
+        report["mean_rollout_length"] = counters.get("rollout_steps", 0) / rollouts if rollouts else 0.0
+        profiled_s = report["profiled_ms"] / 1000
+        report["evaluations_per_second"] = counters.get("evaluations", 0) / profiled_s if profiled_s > 0 else 0.0
+        if self.transpositions is not None:
+            lookups = self.transpositions.hits + self.transpositions.misses
+            report["transposition_table"] = {
+                "entries": len(self.transpositions),
+                "hits": self.transpositions.hits,
+                "misses": self.transpositions.misses,
+                "hit_rate": self.transpositions.hits / lookups if lookups else 0.0,
+                "evictions": self.transpositions.evictions,
+            }
+        if self.states is not None:
+            report["state_cache"] = self.states.stats()
+        report["game"] = self.root.state.get_performance_counters()
+        return report
+
+    def enforce_memory_budget(self) -> int:
+        """
+        Prunes the tree to 80% of its budget if `max_nodes` or `max_bytes` is exceeded.
+
+        Returns:
+            The number of nodes removed.
+        """
+        nodes = self.num_nodes
+        over_nodes = self.max_nodes is not None and nodes > self.max_nodes
+        over_bytes = self.max_bytes is not None and self.estimated_bytes() > self.max_bytes
+        if not (over_nodes or over_bytes):
+            return 0
+        target = nodes
+        if self.max_nodes is not None:
+            target = min(target, self.max_nodes)
+        if self.max_bytes is not None:
+            target = min(target, int(self.max_bytes / (self.estimated_bytes() / nodes)))
+        start = time.perf_counter()
+        removed = self.prune_to(int(target * 0.8))
+        self.profile.add("pruning", time.perf_counter() - start)
+        return removed
+
+    def prune_to(self, target_nodes: int) -> int:
+        """
+        Drops the least-visited subtrees so that at most `target_nodes` nodes remain.
+        A child never has more visits than its parent, so keeping every node above a
+        visit threshold keeps a connected tree around the root.
+
+        Returns:
+            The number of nodes removed.
+        """
+        before = self.num_nodes
+        if self.tree is not None:
+            rows = [row for row in range(1, self.tree.size) if self.tree.states[row] is not None and row != self.root.index]
+            visits = self.tree.visits[rows]
+        else:
+            visits = [n.numVisits for n in self._iter_nodes() if n is not self.root]
+        if len(visits) <= target_nodes - 1:
+            return 0
+        threshold = sorted(visits, reverse=True)[max(target_nodes - 1, 0)] + 1
+
+        if self.tree is not None:
+            self.tree = self.tree.subtree(self.root.index, min_visits=threshold)
+            self.root = self.tree.node(0)
+        else:
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                dropped = []
+                for action, child in list(node.children.items()):
+                    if child.numVisits >= threshold:
+                        stack.append(child)
+                        continue
+                    # The parent keeps the aggregated statistics; the action becomes untried again.
+                    del node.children[action]
+                    if node.best_child is child:
+                        node.best_child = None
+                    dropped.append(action)
+                if dropped:
+                    # Popped from the end, so never-tried actions are expanded before the dropped ones.
+                    node.untried_actions = {**dict.fromkeys(dropped), **(node.untried_actions or {})}
+                    node.isFullyExpanded = False
+            self._recount_nodes()
+            if self.states is not None:
+                self.states.clear()
+            if self.transpositions is not None:
+                self._index_transpositions()
+
+        removed = before - self.num_nodes
+        self.pruned_nodes += removed
+        return removed
+
+    def _iter_nodes(self):
+        """Yields every node reachable from the root once (node backend)."""
+        stack = [self.root]
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            yield node
+            stack.extend(node.children.values())
+
+    def _lookup_transposition(self, state: GameStateBase) -> Optional[MCTSNode]:
+        """
+        Returns the existing node for a transposed state, unless that node is on
+        the current selection path (which would create a cycle).
+        """
+        if self.transpositions is None:
+            return None
+        key = state.get_state_key()
+        if key is None:
+            return None
+        existing = self.transpositions.get(key)
+        if existing is None or any(existing is n for n in (self._path or [])):
+            return None
+        return existing
+
+    def _index_transpositions(self):
+        """Rebuilds the transposition table from the tree under the root."""
+        self.transpositions.clear()
+        for node in self._iter_nodes():
+            key = node.state.get_state_key()
+            if key is not None:
+                self.transpositions.put(key, node)
+
+    def _should_expand(self, node) -> bool:
+        """
+        Returns True if selection should expand `node` rather than descend into
+        one of its children. With progressive widening, a node may only have
+        max(1, C * N^alpha) children, where N is its visit count.
+        """
+        if node.isFullyExpanded:
+            return False
+        if self.widening_constant is None:
+            return True
+        num_children = self.tree.num_children[node.index] if self.tree is not None else len(node.children)
+        return num_children < max(1, int(self.widening_constant * node.numVisits ** self.widening_exponent))
+
+    def selectNode_num(self, node, explorationConstant):
+        """
+        Descends by UCT to a node to expand or a terminal node. The array backend
+        uses its vectorized UCT; with merged transpositions the selected path is
+        recorded for backpropagation. Without either option or progressive
+        widening, the parent implementation is used.
+        """
+        if self.tree is not None:
+            with self.lock:
+                index = node.index
+                while not self.tree.terminal[index]:
+                    if self._should_expand(self.tree.node(index)):
+                        return self.expand(self.tree.node(index))
+                    index = self.tree.best_child(index, explorationConstant)
+            return self.tree.node(index)
+
+        if self.transpositions is None and self.widening_constant is None:
+            return super().selectNode_num(node, explorationConstant)
+        with self.lock:
+            self._path = [node] if self.transpositions is not None else None
+            while not node.isTerminal:
+                if self._should_expand(node):
+                    node = self.expand(node)
+                    if self._path is None:
+                        return node
+                    if node.numVisits == 0:
+                        self._path.append(node)
+                        break
+                else:
+                    node = self.getBestChild(node, explorationConstant)
+                # A transposition may lead into an already searched node; keep descending.
+                if self._path is not None:
+                    self._path.append(node)
+        return node
+
+    def getBestChild(self, node, explorationValue):
+        """
+        Vectorized child selection for the array backend. Pure exploitation
+        (explorationValue 0) returns the cached best child.
+        """
+        if explorationValue == 0:
+            best = self.best_child(node)
+            if best is not None:
+                return best
+        if self.tree is None:
+            # As in ArrayTree.best_child, children left unvisited by a reverted
+            # virtual loss are tried first when exploring and ignored when exploiting.
+            unvisited = self._unvisited_children(node) if self._unvisited else None
+            if not unvisited:
+                return super().getBestChild(node, explorationValue)
+            visited = [child for child in node.children.values() if child.numVisits > 0]
+            if explorationValue or not visited:
+                return random.choice(unvisited)
+            best_value = max(child.totalReward / child.numVisits for child in visited)
+            return random.choice([c for c in visited if c.totalReward / c.numVisits == best_value])
+        return self.tree.node(self.tree.best_child(node.index, explorationValue))
+
+    def _unvisited_children(self, node) -> List[MCTSNode]:
+        """Returns the children of `node` that revert_virtual_loss left without visits."""
+        self._unvisited = {child for child in self._unvisited if child.numVisits == 0}
+        return [child for child in node.children.values() if child in self._unvisited]
+
+    def getAction(self, root, bestChild):
+        """Maps a child node back to the action that leads to it."""
+        if self.tree is not None:
+            return self.tree.actions[bestChild.index] if bestChild.parent == root else None
+        action = getattr(bestChild, "action", None)
+        if action is not None and root.children.get(action) is bestChild:
+            return action
+        for action, node in root.children.items():
+            if node is bestChild:
+                return action
+        return None
+
+    def best_child(self, node):
+        """
+        Returns the visited child of `node` with the best mean reward from the
+        cache, recomputing it only if it was invalidated. Returns None if no
+        child has been visited or the cache is disabled.
+        """
+        if self.tree is not None:
+            row = self.tree.best_row(node.index)
+            return self.tree.node(row) if row >= 0 else None
+        if self.transpositions is not None:
+            return None
+        if node.best_child is None:
+            visited = [child for child in node.children.values() if child.numVisits > 0]
+            if not visited:
+                return None
+            best_value = max(child.totalReward / child.numVisits for child in visited)
+            node.best_child = random.choice([c for c in visited if c.totalReward / c.numVisits == best_value])
+            node.best_value = best_value
+        return node.best_child
+
+    def _update_best(self, parent, child):
+        """Updates the cached best child of `parent` after the statistics of `child` changed."""
+        if self.tree is not None:
+            self.tree.update_best(parent.index, child.index)
+            return
+        best = parent.best_child
+        if best is None or self.transpositions is not None:
+            return
+        if best is child:
+            mean = child.totalReward / child.numVisits if child.numVisits > 0 else -math.inf
+            if mean >= parent.best_value:
+                parent.best_value = mean
+            else:
+                parent.best_child = None # Recomputed when next requested
+        elif child.numVisits > 0:
+            mean = child.totalReward / child.numVisits
+            if mean > parent.best_value:
+                parent.best_child = child
+                parent.best_value = mean
 
-        for action in actions:
-            if action not in node.children:
-                newNode = MCTSNode(node.state.takeAction(action), node)
-                node.children[action] = newNode
-                if len(actions) == len(node.children):
-                    node.isFullyExpanded = True
-                return newNode
-        raise Exception("Should never reach here")
+    def _update_best_along(self, path: List[Any]):
+        """Updates the cached best children along a root-to-leaf path."""
+        for i in range(len(path) - 1, 0, -1):
+            self._update_best(path[i - 1], path[i])
+
+    def principal_variation(self) -> List[Tuple[Any, Any]]:
+        """Returns the (action, node) pairs of the best line from the root, following the cached best children."""
+        line = []
+        node = self.root
+        while node.children:
+            child = self.getBestChild(node, 0)
+            action = self.getAction(node, child)
+            if action is None:
+                break
+            line.append((action, child))
+            node = child
+        return line
+
+    def advance_root(self, action: Any) -> int:
+        """
+        Promotes the child reached by `action` to be the new root, keeping its
+        subtree statistics and releasing the siblings. If the action has not been
+        expanded yet, a fresh root is created from the resulting state.
+
+        Returns:
+            The number of visits carried over to the new root.
+        """
+        if self.tree is not None:
+            for row in self.tree.child_rows(self.root.index):
+                if self.tree.actions[row] == action:
+                    self.tree = self.tree.subtree(row)
+                    self.root = self.tree.node(0)
+                    return self.root.numVisits
+            self.root.state.materialize()
+            self.tree = ArrayTree(self.root.state.takeAction(action))
+            self.root = self.tree.node(0)
+            return 0
+
+        child = self.root.children.get(action)
+        if child is None:
+            self.root.state.materialize()
+            child = self._make_node(self.root.state.takeAction(action), None)
+        elif self.states is not None:
+            self.states.pin(child) # Before detaching it from the ancestors it may be rebuilt from
+        child.parent = None
+        self.root = child
+        self._recount_nodes()
+        if self.states is not None:
+            self.states.clear()
+        if self.transpositions is not None:
+            self._index_transpositions()
+        return child.numVisits
+
+    def select_with_virtual_loss(self, explorationConstant: float, virtual_loss: float = 1.0) -> List[Any]:
+        """
+        Selects and expands a leaf under the engine lock, then applies a virtual
+        loss (one visit and -virtual_loss reward) along the path, so that further
+        selections before this leaf is evaluated are steered onto other paths.
+
+        Returns:
+            The selected path from the root to the leaf.
+        """
+        start = time.perf_counter()
+        with self.lock:
+            expansion_before = self.profile.seconds("expansion")
+            node = self.root
+            path = [node]
+            self._path = path # Used for cycle detection when transpositions are merged
+            while not node.isTerminal:
+                if self._should_expand(node):
+                    node = self.expand(node)
+                    if node.numVisits == 0:
+                        path.append(node)
+                        break
+                else:
+                    node = self.getBestChild(node, explorationConstant)
+                path.append(node)
+            self._path = None
+            for path_node in path:
+                path_node.numVisits += 1
+                path_node.totalReward -= virtual_loss
+            self._update_best_along(path)
+            expansion = self.profile.seconds("expansion") - expansion_before
+        self.profile.add("selection", time.perf_counter() - start - expansion)
+        return path
+
+    def backpropagate_path(self, path: List[Any], reward: float, virtual_loss: float = 1.0):
+        """Replaces the virtual loss on `path` with the evaluated reward."""
+        start = time.perf_counter()
+        with self.lock:
+            # The visit was already counted with the virtual loss.
+            for path_node in path:
+                path_node.totalReward += virtual_loss + reward
+            self._update_best_along(path)
+        self.profile.add("backpropagation", time.perf_counter() - start)
+
+    def revert_virtual_loss(self, path: List[Any], virtual_loss: float = 1.0):
+        """Removes the virtual loss from a path whose evaluation failed."""
+        with self.lock:
+            for path_node in path:
+                path_node.numVisits -= 1
+                path_node.totalReward += virtual_loss
+                if path_node.numVisits == 0 and path_node is not path[0] and self.tree is None:
+                    self._unvisited.add(path_node) # Node UCT divides by the visits; see getBestChild
+            self._update_best_along(path)
+
+    def evaluate_leaf(self, node) -> float:
+        """
+        Evaluates a leaf without holding the engine lock, mirroring the leaf
+        branch of AntLionMcts.mctsSolver. Terminal leaves are passed to
+        mctsSolver itself, which takes the lock only to mark proven wins and
+        losses (+-inf) and scores any other outcome as 0.
+        """
+        start = time.perf_counter()
+        state = node.state
+        if node.isTerminal:
+            reward = self.mctsSolver(node)
+        elif self.dl:
+            reward = self.dl_method(state)
+        else:
+            reward = state.getCurrentPlayer() * -self.rollout(state)
+        self.profile.add("simulation", time.perf_counter() - start)
+        self.profile.count("evaluations")
+        return reward
+
+    def run_batched_round(self, explorationConstant: float, batch_size: int, virtual_loss: float = 1.0,
+                          root_mask: Optional[List[Any]] = None) -> int:
+        """
+        Selects `batch_size` leaves (kept apart by virtual loss) and evaluates
+        them with one GameStateBase.evaluate_batch call. If the game does not
+        implement the hook, each leaf is evaluated individually. Batch values
+        are rollout results, signed for the leaf's player as in mctsSolver, and
+        terminal leaves are always valued by evaluate_leaf.
+
+        Args:
+            root_mask: Optional pruned action list applied to each selection
+                that expands the root (see `pruned_actions`).
+
+        Returns:
+            The number of leaves evaluated.
+        """
+        paths = []
+        try:
+            for _ in range(batch_size):
+                self.pruned_actions = root_mask
+                paths.append(self.select_with_virtual_loss(explorationConstant, virtual_loss))
+            self.pruned_actions = None
+            rewards: List[Optional[float]] = [None] * len(paths)
+            batch = [i for i, path in enumerate(paths) if not path[-1].isTerminal]
+            start = time.perf_counter()
+            values = self.root.state.evaluate_batch([paths[i][-1].state for i in batch]) if batch else None
+            if values is not None:
+                self.profile.add("batch_evaluation", time.perf_counter() - start)
+                self.profile.count("evaluations", len(batch))
+                for i, value in zip(batch, values):
+                    rewards[i] = paths[i][-1].state.getCurrentPlayer() * -value
+            rewards = [self.evaluate_leaf(path[-1]) if reward is None else reward for path, reward in zip(paths, rewards)]
+        except Exception:
+            self.pruned_actions = None
+            for path in paths:
+                self.revert_virtual_loss(path, virtual_loss)
+            raise
+        for path, reward in zip(paths, rewards):
+            self.backpropagate_path(path, reward, virtual_loss)
+        return len(paths)
+
+    def merge_root_statistics(self, stats: List[Tuple[Any, int, float]]):
+        """
+        Adds root child statistics gathered by independent searches (e.g. root
+        parallel workers) to this tree. Each entry is (action, visits, total_reward).
+        """
+        for action, visits, total_reward in stats:
+            if visits <= 0:
+                continue
+            child = self.expand_action(self.root, action)
+            child.numVisits += visits
+            child.totalReward += total_reward
+            self.root.numVisits += visits
+            self.root.totalReward += total_reward
+            self._update_best(self.root, child)
+
+    def root_leaders(self) -> Tuple[Any, int, int]:
+        """
+        Returns the action of the best root child, chosen as get_best_move does
+        (getBestChild without exploration), with its visit count and the highest
+        visit count among the other root children, or (None, 0, 0) if the root
+        has no children.
+        """
+        if not (self.tree.num_children[self.root.index] if self.tree is not None else self.root.children):
+            return None, 0, 0
+        best = self.getBestChild(self.root, 0)
+        if self.tree is not None:
+            rows = self.tree.child_rows(self.root.index)
+            visits = self.tree.visits[rows.start:rows.stop].copy()
+            visits[best.index - rows.start] = -1
+            second = max(int(visits.max()), 0)
+        else:
+            second = max((child.numVisits for child in self.root.children.values() if child is not best), default=0)
+        return self.getAction(self.root, best), best.numVisits, second
+
+    def root_statistics(self) -> List[Tuple[Any, int, float]]:
+        """Returns (action, visits, total_reward) for every expanded root child."""
+        return [(action, child.numVisits, child.totalReward) for action, child in self.root.children.items()]
+
+    def backpropogate(self, node, reward):
+        """Updates visits and rewards along the path to the root."""
+        if self.tree is not None:
+            self.tree.backpropagate(node.index, reward)
+        elif self._path and self._path[-1] is node:
+            for path_node in self._path:
+                path_node.numVisits += 1
+                path_node.totalReward += reward
+            self._path = None
+        else:
+            child = None
+            while node is not None:
+                node.numVisits += 1
+                node.totalReward += reward
+                if child is not None:
+                    self._update_best(node, child)
+                child, node = node, node.parent
 
     def dl_method(self, state) -> float: # type: ignore
         """
-        Overrides parent to use the AI's value prediction.
+        Overrides parent to use the AI's value prediction. Without one, the leaf
+        is valued by a (possibly depth-limited) rollout, signed as in mctsSolver.
         """
         if self.value is not None:
             reward = self.value
             self.value = None
             return reward
-        return self.rollout(state)
-
+        return state.getCurrentPlayer() * -self.rollout(state)
@@ -1,6 +1,7 @@
 import os
 import subprocess
 import tempfile
+import time
 import re
 import sys
 from typing import Optional
@@ -12,6 +13,10 @@ class MopacEvaluator:
     
     def __init__(self, mopac_path: str = "mopac"):
         self.mopac_path = mopac_path
+        # Performance counters
+        self.calls = 0
+        self.failures = 0
+        self.total_seconds = 0.0
 
     def _mol_to_mopac_input(self, mol: Chem.Mol, keywords: str = "PM7 1SCF") -> str:
         """Converts an RDKit Mol object to a MOPAC input string (XYZ format)."""
@@ -36,6 +41,15 @@ class MopacEvaluator:
 
     def evaluate(self, mol: Chem.Mol, timeout: int = 5) -> MopacResult:
         """Runs MOPAC on the given molecule and returns the parsed result."""
+        start = time.perf_counter()
+        result = self._evaluate(mol, timeout)
+        self.calls += 1
+        self.total_seconds += time.perf_counter() - start
+        if result.status != "success":
+            self.failures += 1
+        return result
+
+    def _evaluate(self, mol: Chem.Mol, timeout: int) -> MopacResult:
         if not mol or mol.GetNumAtoms() == 0:
             return MopacResult(heat_of_formation=0.0, is_valid=False, raw_output="Empty molecule", status="failed")
 
@@ -0,0 +1,183 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.game_state import GameStateBase
+from .mcts_engine import McpMcts
+
+
+def run_search_rounds(engine: McpMcts, exploration_constant: float, num_rounds: Optional[int] = None, time_limit_ms: Optional[float] = None) -> int:
+    """
+    Runs select/simulate/backpropagate rounds on `engine` until `num_rounds`
+    rounds are done or `time_limit_ms` has elapsed, whichever comes first.
+
+    Returns:
+        The number of rounds executed.
+    """
+    deadline = time.perf_counter() + time_limit_ms / 1000 if time_limit_ms else None
+    rounds = 0
+    while (num_rounds is None or rounds < num_rounds) and (deadline is None or time.perf_counter() < deadline):
+        engine.run_round(exploration_constant)
+        rounds += 1
+    return rounds
+
+
+def _root_parallel_worker(
+    state: GameStateBase,
+    seed: int,
+    exploration_constant: float,
+    num_rounds: Optional[int],
+    time_limit_ms: Optional[float],
+    engine_kwargs: Dict[str, Any],
+) -> Tuple[int, List[Tuple[Any, int, float]]]:
+    """Runs an independent search from `state` in a worker process."""
+    random.seed(seed)
+    np.random.seed(seed % (2**32))
+    engine = McpMcts(initial_state=state, **engine_kwargs)
+    rounds = run_search_rounds(engine, exploration_constant, num_rounds, time_limit_ms)
+    return rounds, engine.root_statistics()
+
+
+def run_root_parallel(
+    engine: McpMcts,
+    exploration_constant: float,
+    num_workers: Optional[int] = None,
+    num_rounds: Optional[int] = None,
+    time_limit_ms: Optional[float] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Root-parallel MCTS: runs `num_workers` independent copies of the search
+    from `engine.root.state` in a process pool and merges their root child
+    visit and reward counts into `engine`. No tree is shared, so no locking is
+    needed. Workers are configured like `engine` (see McpMcts.config).
+    `num_rounds` is the per-worker round budget.
+
+    Returns:
+        A dictionary with the number of workers and the rounds executed by each.
+    """
+    if num_rounds is None and time_limit_ms is None:
+        raise ValueError("Either num_rounds or time_limit_ms must be given.")
+    num_workers = num_workers or os.cpu_count() or 1
+    base_seed = seed if seed is not None else random.randrange(2**31)
+    engine_kwargs = engine.config()
+
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        futures = [
+            pool.submit(_root_parallel_worker, engine.root.state, base_seed + i,
+                        exploration_constant, num_rounds, time_limit_ms, engine_kwargs)
+            for i in range(num_workers)
+        ]
+        results = [f.result() for f in futures]
+
+    worker_rounds = []
+    for rounds, stats in results:
+        engine.merge_root_statistics(stats)
+        worker_rounds.append(rounds)
+    return {"num_workers": num_workers, "worker_rounds": worker_rounds}
+
+
+def _slot_worker(
+    engine: McpMcts,
+    seed: int,
+    exploration_constant: float,
+    num_rounds: Optional[int],
+    time_limit_ms: Optional[float],
+) -> Tuple[McpMcts, int, float]:
+    """Continues the search of one slot's engine in a worker process."""
+    random.seed(seed)
+    np.random.seed(seed % (2**32))
+    start = time.perf_counter()
+    rounds = run_search_rounds(engine, exploration_constant, num_rounds, time_limit_ms)
+    engine.enforce_memory_budget()
+    return engine, rounds, (time.perf_counter() - start) * 1000
+
+
+def run_slots_parallel(
+    engines: Dict[str, McpMcts],
+    exploration_constant: float,
+    num_rounds: Optional[int] = None,
+    time_limit_ms: Optional[float] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Tuple[McpMcts, int, float]]:
+    """
+    Searches several independent slots at once, one worker process per slot.
+    Each engine is sent to its worker with its tree, searched for `num_rounds`
+    rounds or `time_limit_ms`, and sent back, so the wall time is that of the
+    slowest slot rather than the sum over slots. A single slot is searched in
+    this process, without copying its tree.
+
+    Returns:
+        A dictionary mapping each slot id to (updated engine, rounds, elapsed_ms).
+    """
+    if num_rounds is None and time_limit_ms is None:
+        raise ValueError("Either num_rounds or time_limit_ms must be given.")
+    base_seed = seed if seed is not None else random.randrange(2**31)
+    if len(engines) == 1:
+        (slot_id, engine), = engines.items()
+        return {slot_id: _slot_worker(engine, base_seed, exploration_constant, num_rounds, time_limit_ms)}
+
+    with ProcessPoolExecutor(max_workers=max(len(engines), 1)) as pool:
+        futures = {
+            slot_id: pool.submit(_slot_worker, engine, base_seed + i, exploration_constant, num_rounds, time_limit_ms)
+            for i, (slot_id, engine) in enumerate(engines.items())
+        }
+        return {slot_id: f.result() for slot_id, f in futures.items()}
+
+
+def run_tree_parallel(
+    engine: McpMcts,
+    exploration_constant: float,
+    num_threads: Optional[int] = None,
+    num_rounds: Optional[int] = None,
+    time_limit_ms: Optional[float] = None,
+    virtual_loss: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    Tree-parallel MCTS: several threads share `engine`'s tree. Selection and
+    expansion run under the engine lock with a virtual loss on the selected
+    path; leaf evaluation (rollouts, RDKit embedding, MOPAC subprocesses) runs
+    concurrently, and each result is backpropagated as soon as it finishes.
+    `num_rounds` is the total round budget shared by all threads.
+
+    Returns:
+        A dictionary with the number of threads and the rounds executed by each.
+    """
+    if num_rounds is None and time_limit_ms is None:
+        raise ValueError("Either num_rounds or time_limit_ms must be given.")
+    num_threads = num_threads or os.cpu_count() or 1
+    deadline = time.perf_counter() + time_limit_ms / 1000 if time_limit_ms else None
+    budget_lock = threading.Lock()
+    started = [0]
+
+    def take_round() -> bool:
+        with budget_lock:
+            if num_rounds is not None and started[0] >= num_rounds:
+                return False
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            started[0] += 1
+            return True
+
+    def worker() -> int:
+        rounds = 0
+        while take_round():
+            path = engine.select_with_virtual_loss(exploration_constant, virtual_loss)
+            try:
+                reward = engine.evaluate_leaf(path[-1])
+            except Exception:
+                engine.revert_virtual_loss(path, virtual_loss)
+                raise
+            engine.backpropagate_path(path, reward, virtual_loss)
+            rounds += 1
+        return rounds
+
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        futures = [pool.submit(worker) for _ in range(num_threads)]
+        worker_rounds = [f.result() for f in futures]
+    return {"num_threads": num_threads, "worker_rounds": worker_rounds}
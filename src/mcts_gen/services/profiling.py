@@ -0,0 +1,62 @@
+import time
+from typing import Any, Dict
+
+
+class SearchProfile:
+    """
+    Cumulative wall time and call counts per search phase, plus free-form
+    counters (rollouts, rollout steps, leaf evaluations, ...).
+
+    Recording is a dictionary update per phase, cheap enough to leave on.
+    Updates from concurrent tree-parallel threads are not locked, so counts
+    may be slightly low under heavy contention.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, list] = {} # name -> [calls, seconds]
+        self.counters: Dict[str, int] = {}
+
+    def add(self, phase: str, seconds: float, calls: int = 1):
+        """Adds `seconds` and `calls` to `phase`."""
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [calls, seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+
+    def count(self, counter: str, amount: int = 1):
+        """Increments `counter` by `amount`."""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def seconds(self, phase: str) -> float:
+        entry = self.phases.get(phase)
+        return entry[1] if entry else 0.0
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.phases.clear()
+        self.counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns per-phase totals (milliseconds, calls, mean microseconds per call
+        and share of the profiled time) together with the counters.
+        """
+        profiled = sum(seconds for _, seconds in self.phases.values())
+        phases = {
+            name: {
+                "total_ms": seconds * 1000,
+                "calls": calls,
+                "mean_us": seconds * 1e6 / calls if calls else 0.0,
+                "share": seconds / profiled if profiled > 0 else 0.0,
+            }
+            for name, (calls, seconds) in self.phases.items()
+        }
+        return {
+            "wall_ms": (time.perf_counter() - self.started) * 1000,
+            "profiled_ms": profiled * 1000,
+            "phases": phases,
+            "counters": dict(self.counters),
+        }
@@ -1,27 +1,129 @@
-from typing import Dict, Optional
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
 from ..services.mcts_engine import McpMcts
 
 class SlotManager:
-    """Manages multiple MCTS search contexts (slots)."""
-    def __init__(self):
-        self.slots: Dict[str, McpMcts] = {}
+    """
+    Manages multiple MCTS search contexts (slots).
+
+    With `max_bytes` set, the estimated memory of the resident engines is kept
+    under the budget by spilling the least recently used inactive slots to
+    `spill_dir`. A spilled slot is reloaded transparently by `get_slot`.
+    """
+    def __init__(self, max_bytes: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.slots: "OrderedDict[str, McpMcts]" = OrderedDict() # Resident slots, least recently used first
         self.active_slot: str = "main"
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spilled: Dict[str, str] = {} # slot_id -> spill file
+        self.spilled_bytes: Dict[str, int] = {} # slot_id -> estimated bytes when it was spilled
+        self.spills = 0
+        self.reloads = 0
+        # Optional veto, e.g. for slots a background job is still searching
+        self.can_spill: Optional[Callable[[str, McpMcts], bool]] = None
 
     def set_slot(self, slot_id: str, engine: McpMcts):
         """Sets or updates an engine for a specific slot."""
+        self._discard_spill(slot_id)
         self.slots[slot_id] = engine
+        self.slots.move_to_end(slot_id)
+        self.enforce_budget(keep=slot_id)
 
     def get_slot(self, slot_id: str) -> Optional[McpMcts]:
-        """Retrieves the engine for a specific slot."""
-        return self.slots.get(slot_id)
+        """Retrieves the engine for a specific slot, reloading it if it was spilled."""
+        engine = self.slots.get(slot_id)
+        if engine is not None:
+            self.slots.move_to_end(slot_id)
+            return engine
+        if slot_id not in self.spilled:
+            return None
+        with open(self.spilled[slot_id], "rb") as f:
+            engine = pickle.load(f)
+        self._discard_spill(slot_id)
+        self.slots[slot_id] = engine
+        self.reloads += 1
+        self.enforce_budget(keep=slot_id)
+        return engine
 
     def activate_slot(self, slot_id: str) -> bool:
         """Swaps the active search context."""
-        if slot_id in self.slots:
+        if slot_id in self.slots or slot_id in self.spilled:
             self.active_slot = slot_id
+            self.get_slot(slot_id)
             return True
         return False
 
     def list_slots(self) -> list[str]:
         """Returns a list of all slot identifiers."""
-        return list(self.slots.keys())
+        return list(self.slots.keys()) + list(self.spilled.keys())
+
+    def is_spilled(self, slot_id: str) -> bool:
+        return slot_id in self.spilled
+
+    def slot_bytes(self, slot_id: str) -> int:
+        """Estimated memory of a slot, using its size when spilled for slots on disk."""
+        engine = self.slots.get(slot_id)
+        if engine is not None:
+            return engine.estimated_bytes()
+        return self.spilled_bytes.get(slot_id, 0)
+
+    def resident_bytes(self) -> int:
+        """Estimated memory of the engines currently held in memory."""
+        return sum(engine.estimated_bytes() for engine in self.slots.values())
+
+    def enforce_budget(self, keep: Optional[str] = None) -> int:
+        """
+        Spills least recently used inactive slots until the resident engines fit in
+        `max_bytes`. The active slot and `keep` are never spilled.
+
+        Returns:
+            The number of slots spilled.
+        """
+        if self.max_bytes is None:
+            return 0
+        spilled = 0
+        resident = self.resident_bytes()
+        for slot_id in list(self.slots):
+            if resident <= self.max_bytes:
+                break
+            engine = self.slots[slot_id]
+            if slot_id in (self.active_slot, keep):
+                continue
+            if self.can_spill is not None and not self.can_spill(slot_id, engine):
+                continue
+            resident -= engine.estimated_bytes()
+            self._spill(slot_id)
+            spilled += 1
+        return spilled
+
+    def _spill(self, slot_id: str):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="mcts_gen_slots_")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"slot_{self.spills}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(self.slots[slot_id], f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spilled_bytes[slot_id] = self.slots[slot_id].estimated_bytes()
+        del self.slots[slot_id]
+        self.spilled[slot_id] = path
+        self.spills += 1
+
+    def _discard_spill(self, slot_id: str):
+        path = self.spilled.pop(slot_id, None)
+        self.spilled_bytes.pop(slot_id, None)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        """Returns the memory budget, resident bytes and spill/reload counters."""
+        return {
+            "max_bytes": self.max_bytes,
+            "resident_bytes": self.resident_bytes(),
+            "resident_slots": len(self.slots),
+            "spilled_slots": len(self.spilled),
+            "spills": self.spills,
+            "reloads": self.reloads,
+        }
@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..models.game_state import GameStateBase
+
+
+class StateCache:
+    """
+    Holds the materialized states of compact tree nodes (see CompactMCTSNode).
+
+    Nodes keep only their incoming action, and every `record_interval` plies a
+    compact record of their state (GameStateBase.to_compact). At most
+    `max_states` states are held, least recently used first out; an evicted
+    state is rebuilt on demand by replaying actions from the nearest ancestor
+    that still has its state or a record. Pinned nodes (the root) keep their
+    state and are never evicted.
+
+    Replaying assumes takeAction is deterministic. Games where it is not (e.g.
+    ligand growth, whose 3D embedding is random) should use a record interval
+    of 1, so that every node is rebuilt from its own record instead.
+    """
+
+    def __init__(self, context_state: GameStateBase, max_states: int = 10_000, record_interval: int = 16):
+        if max_states < 1 or record_interval < 1:
+            raise ValueError("max_states and record_interval must be at least 1.")
+        self.context_state = context_state # Decodes records via from_compact
+        self.max_states = max_states
+        self.record_interval = record_interval
+        self.entries: "OrderedDict[Any, None]" = OrderedDict() # Nodes holding an evictable state
+        self.record_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.replayed = 0 # Actions replayed to rebuild states
+        self.decoded = 0 # States decoded from records
+        self.lock = threading.RLock() # Leaf states are read outside the engine lock by tree-parallel threads
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def record_for(self, state: GameStateBase, depth: int) -> Optional[bytes]:
+        """Returns the compact record to keep for a new node at `depth`, or None."""
+        if depth % self.record_interval:
+            return None
+        record = state.to_compact()
+        self.record_bytes += len(record)
+        return record
+
+    def put(self, node: Any, state: GameStateBase):
+        """Stores the materialized state of `node`, evicting the least recently used states."""
+        with self.lock:
+            node._state = state
+            self.entries[node] = None
+            self.entries.move_to_end(node)
+            while len(self.entries) > self.max_states:
+                evicted, _ = self.entries.popitem(last=False)
+                evicted._state = None
+
+    def pin(self, node: Any):
+        """Keeps the state of `node` (e.g. a new root) resident until it is unpinned by clear()."""
+        with self.lock:
+            state = self.get(node)
+            self.entries.pop(node, None)
+            node._state = state
+
+    def get(self, node: Any) -> GameStateBase:
+        """Returns the state of `node`, rebuilding it if it was evicted."""
+        with self.lock:
+            state = node._state
+            if state is not None:
+                self.hits += 1
+                if node in self.entries:
+                    self.entries.move_to_end(node)
+                return state
+            self.misses += 1
+            path = []
+            while node._state is None and node.record is None:
+                path.append(node)
+                node = node.parent
+            state = node._state
+            if state is None:
+                state = self.context_state.from_compact(node.record)
+                self.decoded += 1
+                self.put(node, state)
+            for path_node in reversed(path):
+                state.materialize()
+                state = state.takeAction(path_node.action)
+                self.replayed += 1
+                self.put(path_node, state)
+            return state
+
+    def clear(self):
+        """Drops every evictable state, e.g. after the tree was pruned or re-rooted."""
+        with self.lock:
+            for node in self.entries:
+                node._state = None
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the cache size and hit, replay and record counters."""
+        lookups = self.hits + self.misses
+        return {
+            "cached_states": len(self.entries),
+            "max_states": self.max_states,
+            "record_interval": self.record_interval,
+            "record_bytes": self.record_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "replayed_actions": self.replayed,
+            "decoded_records": self.decoded,
+        }
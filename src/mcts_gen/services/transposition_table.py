@@ -0,0 +1,66 @@
+import heapq
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TranspositionTable:
+    """
+    Maps state keys (see GameStateBase.get_state_key) to the tree node that
+    first reached that position, so transpositions share one node and its
+    statistics.
+
+    The table holds at most `max_entries` keys. When the cap is exceeded,
+    entries are evicted according to `eviction`:
+        - "lru": the least recently looked-up or inserted entry.
+        - "least_visited": the 10% of entries whose nodes have the fewest visits.
+    Evicting an entry only removes it from the lookup; the node stays in the tree.
+    """
+
+    EVICTION_POLICIES = ("lru", "least_visited")
+
+    def __init__(self, max_entries: int = 100_000, eviction: str = "lru"):
+        if eviction not in self.EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{eviction}'. Use one of {self.EVICTION_POLICIES}.")
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the node stored for `key`, or None."""
+        node = self.entries.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.eviction == "lru":
+            self.entries.move_to_end(key)
+        return node
+
+    def put(self, key: Hashable, node: Any):
+        """Stores `node` under `key`, evicting entries if the table is full."""
+        self.entries[key] = node
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self._evict()
+
+    def clear(self):
+        """Removes every entry."""
+        self.entries.clear()
+
+    def _evict(self):
+        if self.eviction == "lru":
+            self.entries.popitem(last=False)
+            self.evictions += 1
+            return
+        # Evict in batches so the O(n) scan is amortized over many insertions.
+        count = max(1, len(self.entries) // 10)
+        victims = heapq.nsmallest(count, self.entries.items(), key=lambda item: item[1].numVisits)
+        for key, _ in victims:
+            del self.entries[key]
+        self.evictions += len(victims)
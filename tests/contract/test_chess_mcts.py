@@ -93,3 +93,24 @@ def test_to_dict(puzzle_pos_fen):
     state = ChessGameState(fen=puzzle_pos_fen)
     state_dict = state.to_dict()
     assert state_dict == {"fen": puzzle_pos_fen}
+
+def test_evaluate_position():
+    """Test that the static evaluation favours the side with more material, from self.color's view."""
+    assert ChessGameState().evaluate_position() == pytest.approx(0.0)
+
+    white_up_a_queen = "4k3/8/8/8/8/8/8/3QK3 w - - 0 1"
+    value = ChessGameState(fen=white_up_a_queen).evaluate_position()
+    assert 0.0 < value < 1.0
+    assert ChessGameState(fen=white_up_a_queen.replace(" w ", " b ")).evaluate_position() < 0.0
+
+def test_depth_limited_rollout(start_pos_fen):
+    """Test that rollouts stop at rollout_depth and return the static evaluation."""
+    from mcts_gen.services.mcts_engine import McpMcts
+
+    engine = McpMcts(initial_state=ChessGameState(fen=start_pos_fen), rollout_depth=4)
+    for _ in range(5):
+        engine.run_round(1.4)
+    counters = engine.profile.counters
+    assert counters["rollout_cutoffs"] == counters["rollouts"] == 5
+    assert counters["rollout_steps"] == 20
+    assert -1.0 <= engine.root.totalReward / engine.root.numVisits <= 1.0
@@ -1,3 +1,4 @@
+import pytest
 
 import shogi
 from mcts_gen.games.shogi_mcts import ShogiGameState
@@ -20,3 +21,11 @@ def test_shogi_take_action():
         assert new_state.board != initial_state.board
     except Exception as e:
         assert False, f"takeAction failed with an unexpected error: {e}"
+
+def test_evaluate_position():
+    """Test that the static evaluation counts pieces in hand, from Black's view."""
+    assert ShogiGameState().evaluate_position() == pytest.approx(0.0)
+
+    black_holds_a_rook = ShogiGameState("lnsgkgsnl/7b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL b R 1")
+    value = black_holds_a_rook.evaluate_position()
+    assert 0.0 < value < 1.0
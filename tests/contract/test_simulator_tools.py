@@ -1,8 +1,11 @@
 
+import random
+
 import pytest
 from unittest.mock import MagicMock, patch
 
 from mcts_gen.services.ai_gp_simulator import AiGpSimulator
+from mcts_gen.services.parallel_search import run_slots_parallel
 from fastmcp import FastMCP
 
 @pytest.fixture
@@ -73,3 +76,127 @@ def test_improvement_metric(simulator: AiGpSimulator):
         stats4 = result4.get("simulation_stats", {})
         assert stats4.get("improvement") == 0  # 0.4 < 0.8, so it's not an improvement
         assert stats4.get("eaten") == pytest.approx(0.4)
+
+def test_performance_profile(simulator: AiGpSimulator):
+    """Tests that rounds are broken down into phases and that reset clears the counters."""
+    simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=20)
+    report = simulator.get_performance_profile(reset=True)
+    assert "error" not in report
+
+    engine_report = report["engine"]
+    for phase in ("selection", "expansion", "simulation", "backpropagation"):
+        assert phase in engine_report["phases"]
+    assert engine_report["phases"]["selection"]["calls"] == 20
+    assert engine_report["counters"]["evaluations"] == 20
+    assert engine_report["mean_rollout_length"] >= 0
+    assert "bookkeeping" in report["server"]["phases"]
+
+    assert simulator.get_performance_profile()["engine"]["counters"] == {}
+    assert "error" in simulator.get_performance_profile(slot_id="missing")
+
+def test_checkpoint_paths_stay_in_checkpoint_dir(simulator: AiGpSimulator, tmp_path):
+    """Tests that save_slot/load_slot round-trip inside the checkpoint directory and reject other paths."""
+    simulator.checkpoint_dir = str(tmp_path / "checkpoints")
+    simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=20)
+
+    assert "error" not in simulator.save_slot("main", "main.ckpt")
+    restored = simulator.load_slot("main.ckpt", slot_id="restored")
+    assert restored["root_visits"] == 20
+    assert simulator.slots.active_slot == "restored"
+
+    outside = str(tmp_path / "outside.ckpt")
+    for path in (outside, "../outside.ckpt"):
+        assert "error" in simulator.save_slot("main", path)
+        assert "error" in simulator.load_slot(path)
+    assert not (tmp_path / "outside.ckpt").exists()
+
+def test_busy_slot_is_protected_from_other_tools(simulator: AiGpSimulator, tmp_path):
+    """Tests that a running job's slot cannot be replaced or searched, while read tools still answer."""
+    simulator.checkpoint_dir = str(tmp_path)
+    simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=5)
+    assert "error" not in simulator.save_slot("main", "main.ckpt")
+
+    started = simulator.start_mcts_analysis(exploration_constant=1.4, num_rounds=None, time_limit_ms=60_000)
+    job_id = started["job_id"]
+    try:
+        for result in (
+            simulator.reinitialize_mcts(state_module="mcts_gen.games.dummy_game", state_class="TicTacToeDummy"),
+            simulator.load_slot("main.ckpt"),
+            simulator.run_mcts_round(exploration_constant=1.4),
+            simulator.advance_root("4"),
+        ):
+            assert "busy" in result["error"]
+        assert simulator.get_job_status(job_id)["state"] == "running"
+
+        assert "best_move" in simulator.get_best_move()
+        assert "principal_variation" in simulator.get_principal_variation()
+        assert "error" not in simulator.get_performance_profile()
+        assert "error" not in simulator.save_slot("main", "during_job.ckpt")
+        # Other slots can still be created while the job runs.
+        assert "error" not in simulator.reinitialize_mcts(
+            state_module="mcts_gen.games.dummy_game", state_class="TicTacToeDummy", slot_id="other")
+    finally:
+        simulator.cancel_job(job_id)
+    assert "error" not in simulator.load_slot("main.ckpt")
+
+def test_finished_jobs_are_forgotten(simulator: AiGpSimulator):
+    """Tests that jobs are dropped once their final status is reported, and unpolled ones are capped."""
+    job_id = simulator.start_mcts_analysis(exploration_constant=1.4, num_rounds=5)["job_id"]
+    simulator.jobs[job_id].join()
+    assert simulator.get_job_status(job_id)["state"] == "completed"
+    assert "not found" in simulator.get_job_status(job_id)["error"]
+
+    job_id = simulator.start_mcts_analysis(exploration_constant=1.4, num_rounds=None, time_limit_ms=60_000)["job_id"]
+    assert simulator.cancel_job(job_id)["state"] == "cancelled"
+    assert job_id not in simulator.jobs
+
+    for _ in range(simulator.MAX_FINISHED_JOBS + 3):
+        job_id = simulator.start_mcts_analysis(exploration_constant=1.4, num_rounds=1)["job_id"]
+        simulator.jobs[job_id].join()
+    assert len(simulator.jobs) == simulator.MAX_FINISHED_JOBS + 1
+
+def test_early_stopping_reports_the_best_move(simulator: AiGpSimulator):
+    """Tests that a stable best move stops the batch early and is the move get_best_move reports."""
+    random.seed(4)
+    result = simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=500, stable_rounds=3)
+    assert result["stop_reason"] == "stable_best_move"
+    assert result["rounds_executed"] < 500
+    action, _, _ = simulator.engine.root_leaders()
+    assert simulator.get_best_move()["best_move"] == str(action)
+
+    timed = simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=None, time_limit_ms=50)
+    assert timed["stop_reason"] == "time_limit"
+    assert timed["rounds_executed"] > 0
+
+@pytest.mark.parametrize("batch_size, expected_rounds", [(1, 9), (4, 12)])
+def test_stable_rounds_are_counted_in_rounds(simulator: AiGpSimulator, batch_size, expected_rounds):
+    """Tests that stable_rounds counts search rounds, also when leaves are evaluated in batches."""
+    with patch.object(simulator.engine, "root_leaders", return_value=(4, 10, 5)):
+        result = simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=100, batch_size=batch_size, stable_rounds=8)
+    assert result["stop_reason"] == "stable_best_move"
+    assert result["rounds_executed"] == expected_rounds
+
+def test_multi_slot_analysis_stays_within_the_memory_budget(simulator: AiGpSimulator, tmp_path):
+    """Tests that multi-slot searches reload spilled slots in batches that fit the slot memory budget."""
+    for slot_id in ("a", "b", "c"):
+        simulator.reinitialize_mcts(state_module="mcts_gen.games.dummy_game", state_class="TicTacToeDummy", slot_id=slot_id)
+        simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=30)
+    simulator.activate_mcts_slot("main")
+    slot_bytes = max(simulator.slots.slot_bytes(slot_id) for slot_id in ("a", "b", "c"))
+    budget = simulator.slots.slot_bytes("main") + int(slot_bytes * 1.5)
+    simulator.set_slot_memory_budget(budget, spill_dir=str(tmp_path))
+    assert simulator.slots.stats()["spilled_slots"] == 2
+
+    resident = []
+    real_run = run_slots_parallel
+
+    def recording_run(engines, *args):
+        resident.append(simulator.slots.resident_bytes())
+        return real_run(engines, *args)
+
+    with patch("mcts_gen.services.ai_gp_simulator.run_slots_parallel", side_effect=recording_run):
+        result = simulator.run_multi_slot_analysis(exploration_constant=1.4, slot_ids=["a", "b", "c"], num_rounds=5, seed=0)
+    assert "error" not in result
+    assert result["batches"] == [["a"], ["b"], ["c"]]
+    assert all(size <= budget for size in resident)
+    assert {slot_id: s["total_root_visits"] for slot_id, s in result["slot_summaries"].items()} == {"a": 35, "b": 35, "c": 35}
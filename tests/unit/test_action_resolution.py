@@ -0,0 +1,36 @@
+from unittest.mock import patch
+
+import pytest
+from fastmcp import FastMCP
+
+from mcts_gen.services.ai_gp_simulator import AiGpSimulator
+
+
+@pytest.fixture
+def simulator() -> AiGpSimulator:
+    sim = AiGpSimulator(FastMCP())
+    sim.reinitialize_mcts(state_module="mcts_gen.games.dummy_game", state_class="TicTacToeDummy")
+    return sim
+
+
+def test_actions_are_resolved_once_per_call(simulator: AiGpSimulator):
+    """Tests that actions_to_expand is resolved once for a whole analysis and restricts the root."""
+    with patch.object(simulator, "_resolve_actions_to_expand", wraps=simulator._resolve_actions_to_expand) as resolve:
+        result = simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=20, actions_to_expand=["4", "8"])
+    assert resolve.call_count == 1
+    assert result["rounds_executed"] == 20
+    assert "unmatched_actions" not in result
+    assert set(simulator.engine.root.children) == {4, 8}
+
+
+def test_unmatched_actions_are_reported(simulator: AiGpSimulator):
+    """Tests that strings matching no legal action are reported and the others still prune the root."""
+    result = simulator.run_mcts_round(exploration_constant=1.4, actions_to_expand=["2", "e2e4", "9"])
+    assert result["unmatched_actions"] == ["e2e4", "9"]
+    assert set(simulator.engine.root.children) == {2}
+
+
+def test_search_is_unpruned_when_nothing_matches(simulator: AiGpSimulator):
+    result = simulator.run_mcts_analysis(exploration_constant=1.4, num_rounds=20, actions_to_expand=["x"])
+    assert result["unmatched_actions"] == ["x"]
+    assert len(simulator.engine.root.children) == 9
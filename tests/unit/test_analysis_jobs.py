@@ -0,0 +1,40 @@
+import pytest
+
+from mcts_gen.games.dummy_game import TicTacToeDummy
+from mcts_gen.services.analysis_jobs import AnalysisJob
+from mcts_gen.services.mcts_engine import McpMcts
+
+
+def test_job_runs_its_rounds_in_the_background():
+    """Tests that a job searches the engine for its round budget and reports the result."""
+    engine = McpMcts(initial_state=TicTacToeDummy())
+    job = AnalysisJob(engine, "main", 1.4, num_rounds=50, root_mask=[4])
+    job.start()
+    job.join(timeout=30)
+
+    status = job.status()
+    assert (status["state"], status["stop_reason"], status["rounds_done"]) == ("completed", "num_rounds", 50)
+    assert status["total_root_visits"] == engine.root.numVisits == 50
+    assert status["best_move"] == "4"
+    assert set(engine.root.children) == {4}
+    assert engine.pruned_actions is None
+
+
+def test_cancelled_job_stops_between_rounds():
+    """Tests that cancelling a time-limited job stops it and keeps every finished round."""
+    engine = McpMcts(initial_state=TicTacToeDummy())
+    job = AnalysisJob(engine, "main", 1.4, num_rounds=None, time_limit_ms=60_000)
+    job.start()
+    assert job.running
+    job.cancel()
+    job.join(timeout=30)
+
+    status = job.status()
+    assert (status["state"], status["stop_reason"]) == ("cancelled", "cancelled")
+    assert not job.running
+    assert engine.root.numVisits == status["rounds_done"]
+
+
+def test_job_needs_a_budget():
+    with pytest.raises(ValueError):
+        AnalysisJob(McpMcts(initial_state=TicTacToeDummy()), "main", 1.4, num_rounds=None)
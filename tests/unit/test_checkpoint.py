@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from mcts_gen.games.dummy_game import TicTacToeDummy
+from mcts_gen.services.checkpoint import load_engine, read_metadata, save_engine
+from mcts_gen.services.mcts_engine import McpMcts
+
+
+def test_checkpoint_keeps_engine_options(tmp_path):
+    """Tests that a restored engine has the options of the saved one."""
+    random.seed(1)
+    engine = McpMcts(initial_state=TicTacToeDummy(), iterationLimit=50, rollout_depth=2,
+                     widening_constant=3.0, widening_exponent=0.6, max_nodes=1000, max_bytes=10**7)
+    for _ in range(40):
+        engine.run_round(1.4)
+    path = str(tmp_path / "slot.ckpt")
+    save_engine(engine, path)
+
+    restored = load_engine(path)
+    assert restored.config() == {**engine.config(), "tree_backend": "array"}
+    assert restored.rollout_depth == 2
+
+
+def test_checkpoint_round_trip_restores_the_tree(tmp_path):
+    """Tests that statistics, actions and lazily decoded states survive a round trip."""
+    random.seed(2)
+    engine = McpMcts(initial_state=TicTacToeDummy(), tree_backend="array")
+    for _ in range(60):
+        engine.run_round(1.4)
+    path = str(tmp_path / "slot.ckpt")
+    summary = save_engine(engine, path, metadata={"slot_id": "main"})
+    assert summary["nodes"] == engine.num_nodes
+    assert read_metadata(path) == {"slot_id": "main"}
+
+    restored = load_engine(path)
+    assert restored.tree_backend == "array"
+    assert restored.root.numVisits == engine.root.numVisits
+    for action, child in engine.root.children.items():
+        twin = restored.root.children[action]
+        assert (twin.numVisits, twin.totalReward) == (child.numVisits, child.totalReward)
+        assert twin.state.board == child.state.board
+    restored.run_round(1.4)
+    assert restored.root.numVisits == engine.root.numVisits + 1
+
+
+@pytest.mark.parametrize("options", [
+    {"transposition_table": True, "transposition_size": 500, "expansion_batch_size": 2},
+    {"compact_states": True, "state_cache_size": 8, "state_record_interval": 2},
+])
+def test_node_only_options_restore_a_node_tree(tmp_path, options):
+    """Tests that engines using node-backend options are restored with them instead of dropping them."""
+    random.seed(3)
+    engine = McpMcts(initial_state=TicTacToeDummy(), **options)
+    for _ in range(60):
+        engine.run_round(1.4)
+    path = str(tmp_path / "slot.ckpt")
+    save_engine(engine, path)
+
+    restored = load_engine(path)
+    assert restored.config() == engine.config()
+    assert restored.root.numVisits == engine.root.numVisits
+    assert {a: c.numVisits for a, c in restored.root.children.items()} == \
+        {a: c.numVisits for a, c in engine.root.children.items()}
+    assert restored.num_nodes == engine.num_nodes
+    restored.run_round(1.4)
+
+
+def test_unsupported_version_is_rejected_before_unpickling(tmp_path):
+    engine = McpMcts(initial_state=TicTacToeDummy())
+    path = tmp_path / "slot.ckpt"
+    save_engine(engine, str(path))
+    data = path.read_bytes().replace(b'"version": 1', b'"version": 9', 1)
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="version"):
+        load_engine(str(path))
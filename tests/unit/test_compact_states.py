@@ -0,0 +1,51 @@
+import random
+
+import pytest
+from mcts_gen.games.dummy_game import TicTacToeDummy
+from mcts_gen.services.mcts_engine import McpMcts
+
+
+def _search(seed, **kwargs):
+    random.seed(seed)
+    engine = McpMcts(initial_state=TicTacToeDummy(), **kwargs)
+    for _ in range(300):
+        engine.run_round(1.4)
+    return engine
+
+
+def test_compact_states_match_full_states():
+    """Tests that a compact tree searches identically while holding few states."""
+    full = _search(7)
+    compact = _search(7, compact_states=True, state_cache_size=8, state_record_interval=3)
+
+    assert compact.root.numVisits == full.root.numVisits
+    assert {a: c.numVisits for a, c in compact.root.children.items()} == \
+        {a: c.numVisits for a, c in full.root.children.items()}
+    assert len(compact.states) <= 8
+    assert compact.estimated_bytes() < full.estimated_bytes()
+
+
+def test_evicted_states_are_rebuilt():
+    """Tests that evicted states are replayed from the nearest cached ancestor or record."""
+    engine = _search(3, compact_states=True, state_cache_size=4, state_record_interval=2)
+    for node in engine._iter_nodes():
+        if node.parent is not None:
+            assert node.state.board == node.parent.state.takeAction(node.action).board
+    stats = engine.states.stats()
+    assert stats["replayed_actions"] > 0
+    assert stats["decoded_records"] > 0
+
+
+def test_advance_root_keeps_state():
+    """Tests that re-rooting pins the new root's state."""
+    engine = _search(5, compact_states=True, state_cache_size=4)
+    action = next(iter(engine.root.children))
+    expected = engine.root.state.takeAction(action).board
+    engine.advance_root(action)
+    engine.states.clear()
+    assert engine.root.state.board == expected
+
+
+def test_compact_states_require_node_backend():
+    with pytest.raises(ValueError):
+        McpMcts(initial_state=TicTacToeDummy(), compact_states=True, tree_backend="array")
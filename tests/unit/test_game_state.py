@@ -35,3 +35,47 @@ def test_concrete_game_state_requires_methods():
     instance = CompleteState()
     assert instance is not None
     assert instance.getCurrentPlayer() == 1
+
+def test_push_pop_is_optional():
+    """Tests that games without push/pop keep working and fail loudly if it is called."""
+    class CopyOnlyState(GameStateBase):
+        def getCurrentPlayer(self):
+            return 1
+        def getPossibleActions(self):
+            return []
+        def takeAction(self, action):
+            return self
+        def isTerminal(self):
+            return True
+        def getReward(self):
+            return 0.0
+
+    state = CopyOnlyState()
+    assert state.supports_push_pop is False
+    assert state.scratch_copy() is not state
+    with pytest.raises(NotImplementedError):
+        state.push("a")
+    with pytest.raises(NotImplementedError):
+        state.pop()
+
+def test_batched_expansion_builds_siblings_together():
+    """Tests that batched expansion requests sibling states in one takeActions call."""
+    from mcts_gen.games.dummy_game import TicTacToeDummy
+    from mcts_gen.services.mcts_engine import McpMcts
+
+    calls = []
+
+    class CountingTicTacToe(TicTacToeDummy):
+        def takeActions(self, actions):
+            calls.append(len(actions))
+            return super().takeActions(actions)
+
+    engine = McpMcts(initial_state=CountingTicTacToe(), expansion_batch_size=4)
+    for _ in range(9):
+        engine.run_round(1.4)
+    # Children are plain TicTacToeDummy states, so only the root's nine children are counted.
+    assert len(engine.root.children) == 9
+    assert calls == [4, 4, 1]
+    assert engine.root.prepared_states is None
+    for action, child in engine.root.children.items():
+        assert child.state.board == TicTacToeDummy().takeAction(action).board
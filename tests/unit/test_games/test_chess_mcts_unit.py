@@ -21,3 +21,24 @@ def test_get_state_summary_pgn():
     assert isinstance(summary["pgn"], str)
     # The PGN includes headers, so we check for the moves within the string
     assert "1. e4 e5 2. Nf3 Nc6" in summary["pgn"]
+
+def test_push_pop_matches_take_action():
+    """
+    Tests that push/pop on a scratch copy mirrors takeAction and leaves the original untouched.
+    """
+    state = ChessGameState()
+    scratch = state.scratch_copy()
+
+    moves = ["e2e4", "e7e5", "g1f3"]
+    expected = state
+    for move_uci in moves:
+        scratch.push(move_uci)
+        expected = expected.takeAction(move_uci)
+
+    assert scratch.board.fen() == expected.board.fen()
+    assert scratch.color == state.color
+    assert not state.board.move_stack
+
+    for _ in moves:
+        scratch.pop()
+    assert scratch.board.fen() == state.board.fen()
@@ -22,3 +22,23 @@ def test_get_state_summary_kif():
     assert "1 ７六歩(77)" in summary["kif"]
     assert "2 ３四歩(33)" in summary["kif"]
     assert "3 ２二角成(88)" in summary["kif"]
+
+def test_push_pop_matches_take_action():
+    """
+    Tests that push/pop on a scratch copy mirrors takeAction and leaves the original untouched.
+    """
+    state = ShogiGameState()
+    scratch = state.scratch_copy()
+
+    moves = ["7g7f", "3c3d", "8h2b+"]
+    expected = state
+    for move_usi in moves:
+        scratch.push(move_usi)
+        expected = expected.takeAction(move_usi)
+
+    assert scratch.board.sfen() == expected.board.sfen()
+    assert not state.board.move_stack
+
+    for _ in moves:
+        scratch.pop()
+    assert scratch.board.sfen() == state.board.sfen()
@@ -1,3 +1,4 @@
+import random
 import unittest
 import numpy as np
 import os
@@ -12,8 +13,12 @@ from src.mcts_gen.games.ligand_mcts import (
     LigandState,
     Evaluator,
     LigandMCTSGameState,
+    conformer_cache,
+    embed_batch,
     load_pocket_atm_pdb
 )
+from src.mcts_gen.services.mcts_engine import McpMcts
+from src.mcts_gen.services.parallel_search import run_tree_parallel
 
 # RDKit is a test dependency
 try:
@@ -125,6 +130,176 @@ class TestLigandMCTS(unittest.TestCase):
         small_mol_state = LigandState(mol=Chem.MolFromSmiles("C"))
         self.assertFalse(small_mol_state.is_terminal())
 
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_orientations_share_conformer_ensemble(self):
+        """Orientation actions of one attachment embed the conformer ensemble once."""
+        conformer_cache.clear()
+        parent = LigandState().apply_action(LigandAction(frag_smiles="c1ccccc1"))
+        parent.embed()
+        hits, misses = conformer_cache.hits, conformer_cache.misses
+
+        children = [parent.apply_action(LigandAction(frag_smiles="C(=O)O", attach_idx=0, orientation_idx=ori))
+                    for ori in range(3)]
+        for child in children:
+            child.embed()
+        self.assertEqual(conformer_cache.misses - misses, 1)
+        self.assertEqual(conformer_cache.hits - hits, 2)
+
+        # A cached ensemble gives the same pose as a fresh embedding.
+        conformer_cache.clear()
+        fresh = parent.apply_action(LigandAction(frag_smiles="C(=O)O", attach_idx=0, orientation_idx=2))
+        fresh.embed()
+        np.testing.assert_allclose(fresh.mol.GetConformer().GetPositions(),
+                                   children[2].mol.GetConformer().GetPositions())
+
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_embedding_is_deferred(self):
+        """Growth steps only edit the graph; coordinates are generated once, when read."""
+        state = LigandState()
+        for action in [LigandAction(frag_smiles="c1ccccc1"),
+                       LigandAction(frag_smiles="C(=O)O", attach_idx=0, orientation_idx=1),
+                       LigandAction(frag_smiles="N", attach_idx=3, orientation_idx=2)]:
+            state = state.apply_action(action)
+        self.assertEqual(len(state.pending), 3)
+        self.assertEqual(state.mol.GetNumAtoms(), 10)
+
+        misses = conformer_cache.misses
+        mol = state.embed()
+        self.assertEqual(conformer_cache.misses - misses, 1)
+        self.assertEqual(state.pending, [])
+        self.assertEqual(mol.GetNumConformers(), 1)
+        self.assertEqual(mol.GetNumAtoms(), 10)
+
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_state_key_and_compact_records_do_not_embed(self):
+        """Transposition keys and compact records are built from the pending growth, without embedding."""
+        game = LigandMCTSGameState(pocket_path=self.pocket_file)
+        parent = game.takeAction(LigandAction(frag_smiles="c1ccccc1"))
+        parent.internal_state.embed()
+        child = parent.takeAction(LigandAction(frag_smiles="C(=O)O", attach_idx=0, orientation_idx=1))
+        sibling = parent.takeAction(LigandAction(frag_smiles="C(=O)O", attach_idx=0, orientation_idx=2))
+
+        misses = conformer_cache.misses
+        key = child.get_state_key()
+        restored = game.from_compact(child.to_compact())
+        self.assertEqual(conformer_cache.misses, misses)
+        self.assertEqual(len(child.internal_state.pending), 1)
+        self.assertNotEqual(key, sibling.get_state_key())
+        self.assertEqual(restored.get_state_key(), key)
+
+        # Embedding keeps the key, and the restored record embeds to the same pose.
+        child.internal_state.embed()
+        self.assertEqual(child.get_state_key(), key)
+        np.testing.assert_allclose(restored.internal_state.embed().GetConformer().GetPositions(),
+                                   child.internal_state.mol.GetConformer().GetPositions())
+
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_default_search_hits_conformer_cache(self):
+        """Serial rounds embed each tree leaf once, so sibling orientations share their ensemble."""
+        random.seed(0)
+        conformer_cache.clear()
+        engine = McpMcts(initial_state=LigandMCTSGameState(pocket_path=self.pocket_file, target_size=8))
+        for _ in range(12):
+            engine.run_round(1.4)
+        self.assertGreater(conformer_cache.hits, 0)
+        self.assertGreater(engine.performance_profile()["game"]["conformer_cache_hit_rate"], 0.0)
+
+    def _assert_tree_poses_match_stepwise_growth(self, engine):
+        """Every expanded node is embedded, and each child has the pose of one step from it."""
+        edges, stack = [], [engine.root]
+        while stack:
+            node = stack.pop()
+            for action, child in node.children.items():
+                self.assertEqual(node.state.internal_state.pending, [])
+                self.assertLessEqual(len(child.state.internal_state.pending), 1)
+                edges.append((node.state, action, child.state))
+                stack.append(child)
+        self.assertGreater(len(edges), 0)
+        for parent, action, child in edges:
+            stepwise = parent.takeAction(action)
+            if len(child.get_state_key()) == 2: # Keyed after it was embedded
+                stepwise.internal_state.embed()
+            self.assertEqual(child.get_state_key(), stepwise.get_state_key())
+            np.testing.assert_allclose(child.internal_state.embed().GetConformer().GetPositions(),
+                                       stepwise.internal_state.embed().GetConformer().GetPositions())
+
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_leaves_valued_without_rollouts_are_embedded_on_expansion(self):
+        """Children of a leaf valued without a rollout still grow one step from its pose."""
+        random.seed(0)
+        engine = McpMcts(initial_state=LigandMCTSGameState(pocket_path=self.pocket_file, target_size=8))
+        engine.rollout = lambda state: 0.0 # Like a dl_method value: the leaf is never embedded
+        for _ in range(30):
+            engine.run_round(1.4)
+        self._assert_tree_poses_match_stepwise_growth(engine)
+
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_tree_parallel_search_embeds_consistently(self):
+        """Threads embedding leaves outside the engine lock leave consistent tree states."""
+        random.seed(0)
+        engine = McpMcts(initial_state=LigandMCTSGameState(pocket_path=self.pocket_file, target_size=8))
+        result = run_tree_parallel(engine, 1.4, num_threads=4, num_rounds=24)
+        self.assertEqual(sum(result["worker_rounds"]), 24)
+        self._assert_tree_poses_match_stepwise_growth(engine)
+
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_embed_batch_matches_single_embedding(self):
+        """Sibling children embedded together get the same poses as one at a time."""
+        parent = LigandState().apply_action(LigandAction(frag_smiles="c1ccccc1"))
+        parent.embed()
+        actions = [LigandAction(frag_smiles=frag, attach_idx=0, orientation_idx=ori)
+                   for frag in ("C(=O)O", "N") for ori in range(3)]
+
+        batch = [parent.apply_action(action) for action in actions]
+        embed_batch(batch, num_threads=2)
+        conformer_cache.clear()
+        for action, child in zip(actions, batch):
+            self.assertEqual(child.pending, [])
+            single = parent.apply_action(action)
+            np.testing.assert_allclose(single.embed().GetConformer().GetPositions(),
+                                       child.mol.GetConformer().GetPositions())
+
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_attachment_sites_need_free_valence(self):
+        """Only atoms with a hydrogen to replace are offered as attachment points."""
+        state = LigandState(mol=Chem.MolFromSmiles("CC(C)(C)C(=O)[O-]"),
+                            fragment_library={"C", "C(F)(F)(F)F", "c1cc[nH]c1"})
+        # The quaternary carbon, the carbonyl carbon and both oxygens have no hydrogens.
+        self.assertEqual(state.attachment_sites(), [0, 2, 3])
+        actions = state.legal_actions()
+        self.assertEqual({a.attach_idx for a in actions}, {0, 2, 3})
+        # CF4's carbon cannot form another bond.
+        self.assertNotIn("C(F)(F)(F)F", {a.frag_smiles for a in actions})
+
+        # Attaching to a pyrrole [nH] replaces its explicit hydrogen.
+        pyrrole = LigandState(mol=Chem.MolFromSmiles("c1cc[nH]c1"))
+        self.assertIn(3, pyrrole.attachment_sites())
+        grown = pyrrole.apply_action(LigandAction(frag_smiles="C", attach_idx=3))
+        self.assertEqual(Chem.MolToSmiles(grown.mol), "Cn1cccc1")
+
+    @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
+    def test_brics_fragments_bond_through_dummy_atoms(self):
+        """BRICS fragments are attached at the atom next to their first dummy atom."""
+        fragments = {"[16*]c1ccccc1", "[5*]N[5*]", "[6*]C(=O)O", "[7*]=CC"}
+        state = LigandState(mol=Chem.MolFromSmiles("CCO"), fragment_library=fragments)
+        offered = {a.frag_smiles for a in state.legal_actions()}
+        # A dummy on a double bond has no hydrogen to stand in for.
+        self.assertEqual(offered, fragments - {"[7*]=CC"})
+
+        grown = {
+            frag: Chem.MolToSmiles(state.apply_action(LigandAction(frag_smiles=frag, attach_idx=0)).mol)
+            for frag in offered
+        }
+        self.assertEqual(grown, {
+            "[16*]c1ccccc1": Chem.CanonSmiles("c1ccccc1CCO"),
+            "[5*]N[5*]": Chem.CanonSmiles("NCCO"),
+            "[6*]C(=O)O": Chem.CanonSmiles("OC(=O)CCO"),
+        })
+
+        # A BRICS fragment as the first growth step starts the molecule without dummies.
+        first = LigandState(fragment_library=fragments).apply_action(LigandAction(frag_smiles="[6*]C(=O)O"))
+        self.assertEqual(Chem.MolToSmiles(first.mol), Chem.CanonSmiles("OC=O"))
+
     @unittest.skipIf(Chem is None, "RDKit is not installed, skipping chemical tests")
     def test_game_state_interface(self):
         """Test the LigandMCTSGameState class and its GameStateBase interface."""
@@ -0,0 +1,280 @@
+import random
+
+import pytest
+from mcts_gen.games.dummy_game import TicTacToeDummy
+from mcts_gen.services.mcts_engine import McpMcts
+
+
+def _is_fully_expanded(engine, node):
+    return node.isFullyExpanded if engine.tree is None else engine.tree.is_fully_expanded(node.index)
+
+
+def _nodes(engine):
+    if engine.tree is None:
+        return list(engine._iter_nodes())
+    return [engine.tree.node(row) for row in range(engine.tree.size) if engine.tree.states[row] is not None]
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_pruned_expansion_waits_for_every_pruned_action(backend):
+    """Tests that a pruned node closes only once all pruned actions are expanded, whatever it held before."""
+    engine = McpMcts(initial_state=TicTacToeDummy(), tree_backend=backend)
+    engine.run_round(1.4)
+    assert set(engine.root.children) == {0}
+
+    engine.pruned_actions = [5, 6]
+    engine.run_round(1.4)
+    assert set(engine.root.children) == {0, 5}
+    assert not _is_fully_expanded(engine, engine.root)
+
+    engine.pruned_actions = [5, 6]
+    engine.run_round(1.4)
+    assert set(engine.root.children) == {0, 5, 6}
+    assert _is_fully_expanded(engine, engine.root)
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_root_mask_does_not_restrict_deeper_nodes(backend):
+    """Tests that a root mask that is set while deeper nodes expand leaves those nodes unrestricted."""
+    random.seed(0)
+    engine = McpMcts(initial_state=TicTacToeDummy(), tree_backend=backend)
+    engine.pruned_actions = [4]
+    engine.run_round(1.4)
+    assert set(engine.root.children) == {4}
+    for _ in range(30):
+        engine.pruned_actions = [4]
+        engine.run_round(1.4)
+    assert engine.pruned_actions == [4] # Never consumed below the root
+
+    deeper = [node for node in _nodes(engine) if node != engine.root and node.children]
+    assert deeper
+    for node in deeper:
+        if _is_fully_expanded(engine, node):
+            assert len(node.children) == len(node.state.getPossibleActions())
+
+
+def _played_out(state):
+    """Plays a state out in generation order and returns the final reward."""
+    while not state.isTerminal():
+        state = state.takeAction(state.getPossibleActions()[0])
+    return state.getReward()
+
+
+class PlayedOutTicTacToe(TicTacToeDummy):
+    """Scores batched leaves with the deterministic playout used as the serial rollout."""
+    def evaluate_batch(self, states):
+        return [_played_out(state) for state in states]
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_batched_rewards_match_serial_rewards(backend):
+    """Tests that a batched round backs up the same signed reward as a serial round for the same leaf."""
+    board = [1, -1, 1, -1, 1, -1, 0, 0, 0]
+    serial = McpMcts(initial_state=PlayedOutTicTacToe(board=board[:], player=-1), tree_backend=backend)
+    serial.rollout = _played_out
+    serial.run_round(1.4)
+
+    batched = McpMcts(initial_state=PlayedOutTicTacToe(board=board[:], player=-1), tree_backend=backend)
+    assert batched.run_batched_round(1.4, 1) == 1
+
+    (action, child), = serial.root.children.items()
+    assert set(batched.root.children) == {action}
+    assert child.totalReward != 0
+    assert batched.root.children[action].totalReward == child.totalReward
+    assert batched.root.children[action].numVisits == 1
+
+
+def test_batched_round_masks_every_root_expansion():
+    """Tests that each selection of a batch that expands the root applies the root mask."""
+    engine = McpMcts(initial_state=TicTacToeDummy())
+    engine.run_batched_round(1.4, 3, root_mask=[2, 4, 6])
+    assert set(engine.root.children) == {2, 4, 6}
+    assert engine.root.isFullyExpanded
+    assert engine.pruned_actions is None
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_root_leaders_follow_the_best_move(backend):
+    """Tests that early stopping judges the child get_best_move returns, not the most visited one."""
+    engine = McpMcts(initial_state=TicTacToeDummy(), tree_backend=backend)
+    for _ in range(9):
+        engine.run_round(1.4)
+    children = engine.root.children
+    for action, child in children.items():
+        child.numVisits, child.totalReward = 10, 0.0
+    children[3].numVisits, children[3].totalReward = 40, 8.0 # Most visited, mean 0.2
+    children[5].numVisits, children[5].totalReward = 4, 4.0 # Best mean, 1.0
+    if engine.tree is not None:
+        engine.tree.best[engine.root.index] = -1
+    else:
+        engine.root.best_child = None
+
+    assert engine.getAction(engine.root, engine.getBestChild(engine.root, 0)) == 5
+    assert engine.root_leaders() == (5, 4, 40)
+
+
+def _search(seed, rounds=300, **kwargs):
+    random.seed(seed)
+    engine = McpMcts(initial_state=TicTacToeDummy(), **kwargs)
+    for _ in range(rounds):
+        engine.run_round(1.4)
+    return engine
+
+
+def _root_stats(engine):
+    return {action: (child.numVisits, child.totalReward) for action, child in engine.root.children.items()}
+
+
+def test_array_backend_searches_like_the_node_backend():
+    """Tests that the array backend builds the same tree as the node backend for the same seed."""
+    node = _search(4)
+    array = _search(4, tree_backend="array")
+    assert _root_stats(array) == _root_stats(node)
+    assert array.num_nodes == node.num_nodes
+
+
+class CountingTicTacToe(TicTacToeDummy):
+    """Counts getPossibleActions calls; its children are plain TicTacToeDummy states."""
+    calls = 0
+
+    def getPossibleActions(self):
+        CountingTicTacToe.calls += 1
+        return super().getPossibleActions()
+
+
+def test_untried_actions_are_generated_once_per_node():
+    """Tests that expanding every root child generates the root's actions only once."""
+    engine = McpMcts(initial_state=CountingTicTacToe())
+    CountingTicTacToe.calls = 0 # isTerminal() of the dummy game also lists the actions
+    for _ in range(9):
+        engine.expand(engine.root)
+    assert len(engine.root.children) == 9
+    assert engine.root.isFullyExpanded
+    assert CountingTicTacToe.calls == 1
+
+
+def _subtree_size(node):
+    size, stack = 0, [node]
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(node.children.values())
+    return size
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_advance_root_keeps_the_subtree_statistics(backend):
+    """Tests that the played child becomes the root with its subtree, and unexpanded moves start fresh."""
+    engine = _search(6, tree_backend=backend)
+    action, child = max(engine.root.children.items(), key=lambda item: item[1].numVisits)
+    visits, size = child.numVisits, _subtree_size(child)
+    expected = {a: (c.numVisits, c.totalReward) for a, c in child.children.items()}
+
+    assert engine.advance_root(action) == visits
+    assert engine.root.parent is None
+    assert engine.root.state.board == TicTacToeDummy().takeAction(action).board
+    assert _root_stats(engine) == expected
+    assert engine.num_nodes == size
+    engine.run_round(1.4)
+    assert engine.root.numVisits == visits + 1
+
+    fresh = _search(6, rounds=1, tree_backend=backend)
+    assert fresh.advance_root(8) == 0
+    assert fresh.num_nodes == 1 and not fresh.root.children
+
+
+def test_transpositions_share_one_node():
+    """Tests that move orders reaching the same position are merged into one node."""
+    engine = McpMcts(initial_state=TicTacToeDummy(), transposition_table=True)
+    node = engine.root
+    for action in (0, 4, 2):
+        node = engine.expand_action(node, action)
+    other = engine.root
+    for action in (2, 4, 0):
+        other = engine.expand_action(other, action)
+    assert other is node
+    assert engine.num_nodes == 6
+
+    # A search links transposed children to existing nodes, so there are more edges than tree edges.
+    merged = _search(9, transposition_table=True)
+    edges = sum(len(node.children) for node in merged._iter_nodes())
+    assert merged.num_nodes == len(list(merged._iter_nodes()))
+    assert edges > merged.num_nodes - 1
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_progressive_widening_bounds_the_children(backend):
+    """Tests that no node has more than max(1, C * N^alpha) children."""
+    engine = _search(2, rounds=30, tree_backend=backend, widening_constant=1.0, widening_exponent=0.5)
+    for node in _nodes(engine):
+        assert len(node.children) <= max(1, int(node.numVisits ** 0.5))
+    assert len(engine.root.children) == 5 # Of 9 moves, after 30 visits
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+@pytest.mark.parametrize("cap", [{"max_nodes": 60}, {"max_bytes": 40_000}])
+def test_memory_caps_prune_the_least_visited_subtrees(backend, cap):
+    """Tests that enforcing a node or byte cap keeps the tree within it without losing root statistics."""
+    random.seed(8)
+    engine = McpMcts(initial_state=TicTacToeDummy(), tree_backend=backend, **cap)
+    for _ in range(300):
+        engine.run_round(1.4)
+        engine.enforce_memory_budget()
+        assert engine.num_nodes <= cap.get("max_nodes", engine.num_nodes)
+        assert engine.estimated_bytes() <= cap.get("max_bytes", engine.estimated_bytes())
+    assert engine.pruned_nodes > 0
+    assert engine.num_nodes == len(_nodes(engine))
+    assert engine.root.numVisits == 300
+    assert sum(child.numVisits for child in engine.root.children.values()) <= 300
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_cached_best_child_has_the_best_mean(backend):
+    """Tests that the best child kept up to date during backpropagation matches a full recomputation."""
+    engine = _search(10, rounds=150, tree_backend=backend)
+    for node in _nodes(engine):
+        engine.best_child(node) # Fill the cache, then keep searching
+    for _ in range(150):
+        engine.run_round(1.4)
+    checked = 0
+    for node in _nodes(engine):
+        visited = [child for child in node.children.values() if child.numVisits > 0]
+        if not visited:
+            continue
+        best = engine.best_child(node)
+        assert best.totalReward / best.numVisits == max(c.totalReward / c.numVisits for c in visited)
+        checked += 1
+    assert checked > 10
+
+
+def test_states_built_ahead_count_towards_the_memory_estimate():
+    """Tests that prepared sibling states of batched expansion are included in estimated_bytes."""
+    engine = McpMcts(initial_state=TicTacToeDummy(), expansion_batch_size=4)
+    state_bytes = engine._state_bytes
+    tree_bytes = lambda: engine.num_nodes * (engine.NODE_OVERHEAD_BYTES + state_bytes)
+    engine.expand(engine.root)
+    assert len(engine.root.prepared_states) == 3
+    assert engine.estimated_bytes() == int(tree_bytes() + 3 * state_bytes)
+
+    for _ in range(8):
+        engine.expand(engine.root)
+    assert engine.root.prepared_states is None
+    assert engine.estimated_bytes() == int(tree_bytes())
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_pruned_actions_are_expanded_after_never_tried_ones(backend):
+    """Tests that actions whose subtrees were pruned are only expanded again after every never-tried action."""
+    engine = McpMcts(initial_state=TicTacToeDummy(), tree_backend=backend)
+    for _ in range(5):
+        engine.expand(engine.root)
+    children = engine.root.children
+    assert set(children) == {0, 1, 2, 3, 4}
+    for action, child in children.items():
+        child.numVisits = 1 if action == 4 else 10
+    engine.root.numVisits = 41
+
+    assert engine.prune_to(5) == 1
+    assert set(engine.root.children) == {0, 1, 2, 3}
+    expanded = [engine.getAction(engine.root, engine.expand(engine.root)) for _ in range(5)]
+    assert expanded == [5, 6, 7, 8, 4]
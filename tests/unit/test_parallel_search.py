@@ -0,0 +1,97 @@
+from collections import defaultdict
+
+import pytest
+from mcts_gen.games.dummy_game import TicTacToeDummy
+from mcts_gen.services.mcts_engine import McpMcts
+from mcts_gen.services.parallel_search import _root_parallel_worker, run_root_parallel, run_slots_parallel, run_tree_parallel
+
+
+@pytest.mark.parametrize("options", [
+    {"tree_backend": "array", "widening_constant": 2.0, "widening_exponent": 0.7, "max_nodes": 500, "rollout_depth": 3},
+    {"transposition_table": True, "transposition_size": 64, "transposition_eviction": "least_visited", "max_bytes": 10**6},
+    {"compact_states": True, "state_cache_size": 32, "state_record_interval": 4, "expansion_batch_size": 3},
+])
+def test_config_rebuilds_an_equivalent_engine(options):
+    """Tests that McpMcts.config() returns every constructor option."""
+    engine = McpMcts(initial_state=TicTacToeDummy(), iterationLimit=7, explorationConstant=0.9, **options)
+    config = engine.config()
+    for name, value in options.items():
+        assert config[name] == value
+    assert config["iterationLimit"] == 7
+    assert config["explorationConstant"] == 0.9
+    assert McpMcts(initial_state=TicTacToeDummy(), **config).config() == config
+
+
+def test_root_parallel_merges_the_sum_of_worker_statistics():
+    """Tests that the merged root children hold exactly the summed statistics of the workers."""
+    engine = McpMcts(initial_state=TicTacToeDummy(), rollout_depth=2)
+    result = run_root_parallel(engine, 1.4, num_workers=2, num_rounds=30, seed=11)
+    assert result["worker_rounds"] == [30, 30]
+
+    # Workers are seeded, so replaying them in-process gives the statistics they returned.
+    expected = defaultdict(lambda: [0, 0.0])
+    for i in range(2):
+        _, stats = _root_parallel_worker(TicTacToeDummy(), 11 + i, 1.4, 30, None, engine.config())
+        for action, visits, total_reward in stats:
+            expected[action][0] += visits
+            expected[action][1] += total_reward
+
+    merged = {action: [child.numVisits, child.totalReward] for action, child in engine.root.children.items()}
+    assert merged == dict(expected)
+    assert engine.root.numVisits == 60
+    assert engine.root.totalReward == pytest.approx(sum(total for _, total in expected.values()))
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+@pytest.mark.parametrize("player", [1, -1])
+def test_tree_parallel_scores_terminal_leaves_like_the_solver(backend, player):
+    """Tests that a terminal leaf reached by tree-parallel search gets the serial solver's reward."""
+    board = [1, -1, 1, -1, 1, -1, 1, -1, 0]
+    serial = McpMcts(initial_state=TicTacToeDummy(board=board[:], player=player), tree_backend=backend)
+    serial.run_round(1.4)
+    parallel = McpMcts(initial_state=TicTacToeDummy(board=board[:], player=player), tree_backend=backend)
+    run_tree_parallel(parallel, 1.4, num_threads=2, num_rounds=1)
+
+    (leaf,) = serial.root.children.values()
+    (twin,) = parallel.root.children.values()
+    assert leaf.isTerminal and abs(leaf.totalReward) == float("inf")
+    assert (twin.numVisits, twin.totalReward, twin.value) == (leaf.numVisits, leaf.totalReward, leaf.value)
+
+
+@pytest.mark.parametrize("backend", ["node", "array"])
+def test_virtual_loss_steers_selections_and_is_reverted(backend):
+    """Tests that pending selections avoid each other and leave no virtual loss behind."""
+    engine = McpMcts(initial_state=TicTacToeDummy(), tree_backend=backend)
+    first = engine.select_with_virtual_loss(1.4)
+    second = engine.select_with_virtual_loss(1.4)
+    assert first[-1] != second[-1]
+    assert (engine.root.numVisits, engine.root.totalReward) == (2, -2.0)
+    engine.revert_virtual_loss(first)
+    engine.revert_virtual_loss(second)
+    assert (engine.root.numVisits, engine.root.totalReward) == (0, 0.0)
+    assert len(engine._unvisited) == (2 if backend == "node" else 0) # Only reverted children are tracked
+
+    result = run_tree_parallel(engine, 1.4, num_threads=4, num_rounds=200)
+    assert sum(result["worker_rounds"]) == 200
+    assert engine.root.numVisits == 200
+    assert sum(child.numVisits for child in engine.root.children.values()) == 200
+    assert all(child.numVisits > 0 for child in engine.root.children.values())
+
+
+def test_slots_are_searched_independently_and_reproducibly():
+    """Tests that each slot is searched for its own budget with its own seed, in workers or in-process."""
+    engines = {"a": McpMcts(initial_state=TicTacToeDummy()),
+               "b": McpMcts(initial_state=TicTacToeDummy(board=[1, -1, 0, 0, 0, 0, 0, 0, 0]), tree_backend="array")}
+    results = run_slots_parallel(engines, 1.4, num_rounds=20, seed=5)
+    assert set(results) == {"a", "b"}
+    for slot_id, (engine, rounds, _) in results.items():
+        assert rounds == 20
+        assert engine.root.numVisits == 20
+        assert engine.root.state.board == engines[slot_id].root.state.board
+        assert engines[slot_id].root.numVisits == 0 # Workers search copies
+
+    # The first slot uses the base seed, so searching it alone in-process gives the same tree.
+    (engine, rounds, _), = run_slots_parallel({"a": engines["a"]}, 1.4, num_rounds=20, seed=5).values()
+    assert engine is engines["a"]
+    assert {a: c.numVisits for a, c in engine.root.children.items()} == \
+        {a: c.numVisits for a, c in results["a"][0].root.children.items()}
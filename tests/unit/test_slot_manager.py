@@ -0,0 +1,50 @@
+import os
+import random
+
+from mcts_gen.games.dummy_game import TicTacToeDummy
+from mcts_gen.services.mcts_engine import McpMcts
+from mcts_gen.services.slot_manager import SlotManager
+
+
+def _engine(seed):
+    random.seed(seed)
+    engine = McpMcts(initial_state=TicTacToeDummy())
+    for _ in range(100):
+        engine.run_round(1.4)
+    return engine
+
+
+def test_least_recently_used_slots_are_spilled_and_reloaded(tmp_path):
+    """Tests that slots over the budget are spilled LRU-first and reloaded with their statistics."""
+    engines = {slot_id: _engine(seed) for seed, slot_id in enumerate(("main", "a", "b", "c"))}
+    size = max(engine.estimated_bytes() for engine in engines.values())
+    manager = SlotManager(max_bytes=int(size * 2.5), spill_dir=str(tmp_path))
+    for slot_id, engine in engines.items():
+        manager.set_slot(slot_id, engine)
+
+    assert set(manager.slots) == {"main", "c"}
+    assert sorted(manager.list_slots()) == ["a", "b", "c", "main"]
+    assert manager.resident_bytes() <= manager.max_bytes
+    assert manager.slot_bytes("a") == engines["a"].estimated_bytes()
+    spill_file = manager.spilled["a"]
+
+    reloaded = manager.get_slot("a")
+    assert reloaded is not engines["a"]
+    assert reloaded.root.numVisits == 100
+    assert {a: c.numVisits for a, c in reloaded.root.children.items()} == \
+        {a: c.numVisits for a, c in engines["a"].root.children.items()}
+    assert not os.path.exists(spill_file)
+    assert set(manager.slots) == {"main", "a"} # "c" was now the least recently used inactive slot
+    stats = manager.stats()
+    assert (stats["spills"], stats["reloads"], stats["spilled_slots"]) == (3, 1, 2)
+
+
+def test_vetoed_slots_stay_resident(tmp_path):
+    """Tests that can_spill keeps e.g. slots with running jobs in memory, even over budget."""
+    manager = SlotManager(max_bytes=1, spill_dir=str(tmp_path))
+    manager.can_spill = lambda slot_id, engine: slot_id != "busy"
+    for seed, slot_id in enumerate(("main", "busy", "idle")):
+        manager.set_slot(slot_id, _engine(seed))
+    manager.enforce_budget()
+    assert manager.spilled.keys() == {"idle"}
+    assert set(manager.slots) == {"main", "busy"}